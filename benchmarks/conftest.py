@@ -0,0 +1,32 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Shared configuration for the DISPATCHES benchmarks
+"""
+import os
+
+
+def horizons():
+    """Time-horizon lengths to benchmark, from $DISPATCHES_BENCH_HORIZONS
+    (comma-separated), default 1, 24 and 168 periods.
+    """
+    text = os.environ.get("DISPATCHES_BENCH_HORIZONS", "1,24,168")
+    return [int(n) for n in text.split(",") if n.strip()]
+
+
+def pytest_generate_tests(metafunc):
+    # benchmarks with an "n" argument are run for each horizon length
+    if "n" in metafunc.fixturenames:
+        metafunc.parametrize("n", horizons())
@@ -0,0 +1,113 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Build, initialize and solve benchmarks for the DISPATCHES models, at
+increasing time-horizon lengths. See README.md in this directory.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pyomo.environ import ConcreteModel
+from idaes.core import FlowsheetBlock
+from idaes.generic_models.properties.core.generic.generic_property \
+    import GenericParameterBlock
+
+from dispatches.models.nuclear_case.h2_ideal_vap import configuration
+from dispatches.models.renewables_case.pem_multiperiod import \
+    build_pem_multiperiod
+from dispatches.models.util.solvers import get_solver
+from dispatches.models.fossil_case.thermal_oil.thermal_oil import \
+    ThermalOilParameterBlock
+
+
+ROUNDS = 3
+
+
+def build_thermal_oil(n):
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False,
+                                   "time_set": list(range(n))})
+    m.fs.props = ThermalOilParameterBlock()
+    m.fs.state = m.fs.props.build_state_block(
+        m.fs.config.time, default={"defined_state": True})
+    for t, T in zip(m.fs.config.time, np.linspace(300, 600, n)):
+        m.fs.state[t].flow_mass.fix(1)
+        m.fs.state[t].temperature.fix(T)
+        m.fs.state[t].pressure.fix(101325)
+    return m
+
+
+def build_h2(n):
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False,
+                                   "time_set": list(range(n))})
+    m.fs.props = GenericParameterBlock(default=configuration)
+    m.fs.state = m.fs.props.build_state_block(
+        m.fs.config.time, default={"defined_state": True})
+    for t, T in zip(m.fs.config.time, np.linspace(300, 900, n)):
+        m.fs.state[t].flow_mol.fix(1)
+        m.fs.state[t].mole_frac_comp.fix(1)
+        m.fs.state[t].temperature.fix(T)
+        m.fs.state[t].pressure.fix(101325)
+    return m
+
+
+def build_pem(n):
+    electricity = 1 + 0.5 * np.sin(np.arange(n) * 2 * np.pi / 24)
+    return build_pem_multiperiod(electricity, 5)
+
+
+BUILDERS = {"thermal_oil": build_thermal_oil,
+            "h2": build_h2,
+            "pem": build_pem}
+
+
+def _initialize(m):
+    if hasattr(m.fs, "unit"):
+        m.fs.unit.initialize()
+    else:
+        m.fs.state.initialize()
+
+
+@pytest.mark.parametrize("model", list(BUILDERS))
+def test_build(benchmark, model, n):
+    benchmark.group = "build-%s" % model
+    benchmark.pedantic(BUILDERS[model], args=(n,), rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("model", list(BUILDERS))
+def test_initialize(benchmark, model, n):
+    benchmark.group = "initialize-%s" % model
+    benchmark.pedantic(_initialize,
+                       setup=lambda: ((BUILDERS[model](n),), {}),
+                       rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("model", list(BUILDERS))
+def test_solve(benchmark, model, n):
+    benchmark.group = "solve-%s" % model
+    solver = get_solver()
+
+    def setup():
+        m = BUILDERS[model](n)
+        _initialize(m)
+        return (m,), {}
+
+    def solve(m):
+        return solver.solve(m)
+
+    benchmark.pedantic(solve, setup=setup, rounds=ROUNDS)
@@ -0,0 +1,274 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Reusable charge and discharge heat exchanger flowsheets.
+
+Each model is built and initialized once, then re-solved over a sweep of
+operating points, warm-starting ipopt from the previous solution.
+
+Operating points are dicts with any of the keys:
+    steam_flow_mol [mol/s], steam_pressure [Pa], steam_temperature [K],
+    oil_flow_mass [kg/s], oil_temperature [K], oil_pressure [Pa],
+    heat_duty [W], area [m2], overall_heat_transfer_coefficient [W/m2/K]
+The steam inlet enthalpy is computed from steam_temperature at the steam
+pressure of the same point (or the current one, if the point has none).
+
+The models are initialized at a design point, by default CHARGE_DESIGN_POINT
+or DISCHARGE_DESIGN_POINT, which the builders take as keyword arguments::
+
+    m = build_charge_model(heat_duty=1.0e+08, oil_flow_mass=800)
+"""
+
+from pyomo.opt.solver import SystemCallSolver
+from pyomo.environ import (ConcreteModel,
+                           Suffix,
+                           TerminationCondition,
+                           Var,
+                           units,
+                           value)
+
+from idaes.core import FlowsheetBlock
+from idaes.generic_models.unit_models.heat_exchanger import (
+    HeatExchanger,
+    HeatExchangerFlowPattern)
+from idaes.generic_models.properties.iapws95 import htpx, Iapws95ParameterBlock
+
+from dispatches.models.util.instrumentation import instrument
+from dispatches.models.util.solution_cache import cached_solve
+from dispatches.models.util.solvers import get_solver
+from dispatches.models.fossil_case.thermal_oil.thermal_oil import \
+    ThermalOilParameterBlock
+
+# For each mode: name of the heat exchanger, and the index of the steam and
+# oil sides (1 is the hot side, 2 the cold side)
+_HX_SIDES = {"charge": ("charge_hx", 1, 2),
+             "discharge": ("discharge_hx", 2, 1)}
+
+#: Design point of the charge heat exchanger (steam heats thermal oil)
+CHARGE_DESIGN_POINT = {"steam_flow_mol": 4163,
+                       "steam_pressure": 5.0e+6,
+                       "steam_temperature": 573.15,
+                       "oil_flow_mass": 833.3,
+                       "oil_temperature": 200 + 273.15,
+                       "oil_pressure": 101325,
+                       "area": 12180,
+                       "overall_heat_transfer_coefficient": 432.677}
+
+#: Design point of the discharge heat exchanger (thermal oil heats steam)
+DISCHARGE_DESIGN_POINT = {"steam_flow_mol": 4163,
+                          "steam_pressure": 1.379e+6,
+                          "steam_temperature": 300.15,
+                          "oil_flow_mass": 833.3,
+                          "oil_temperature": 256 + 273.15,
+                          "oil_pressure": 101325,
+                          "area": 12180,
+                          "overall_heat_transfer_coefficient": 432.677}
+
+DESIGN_HEAT_DUTY = 1.066e+08
+
+#: Keys of the dicts returned by get_results
+RESULT_NAMES = ("heat_duty", "area", "overall_heat_transfer_coefficient",
+                "steam_outlet_enth_mol", "oil_outlet_temperature")
+
+_WARM_START_OPTIONS = {"warm_start_init_point": "yes",
+                       "warm_start_bound_push": 1e-9,
+                       "warm_start_mult_bound_push": 1e-9,
+                       "mu_init": 1e-6}
+
+
+def _add_warm_start_suffixes(m):
+    m.ipopt_zL_out = Suffix(direction=Suffix.IMPORT)
+    m.ipopt_zU_out = Suffix(direction=Suffix.IMPORT)
+    m.ipopt_zL_in = Suffix(direction=Suffix.EXPORT)
+    m.ipopt_zU_in = Suffix(direction=Suffix.EXPORT)
+    m.dual = Suffix(direction=Suffix.IMPORT_EXPORT)
+
+
+def build_charge_model(heat_duty=DESIGN_HEAT_DUTY, **design_point):
+    """
+    Build and initialize the charge heat exchanger (steam heats thermal oil).
+
+    Args:
+        heat_duty: heat duty [W] fixed after initialization
+        design_point: operating point keys (see module docstring) that
+                      replace those of CHARGE_DESIGN_POINT for initialization
+
+    Returns:
+        model with the heat duty fixed and the overall heat transfer
+        coefficient free
+    """
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.steam_prop = Iapws95ParameterBlock()
+    m.fs.therminol66_prop = ThermalOilParameterBlock()
+    m.fs.charge_hx = HeatExchanger(
+        default={"shell": {"property_package": m.fs.steam_prop},
+                 "tube": {"property_package": m.fs.therminol66_prop},
+                 "flow_pattern": HeatExchangerFlowPattern.countercurrent})
+
+    set_operating_point(m, **dict(CHARGE_DESIGN_POINT, **design_point))
+    m.fs.charge_hx.initialize()
+    m.fs.charge_hx.heat_duty.fix(heat_duty)
+    m.fs.charge_hx.overall_heat_transfer_coefficient.unfix()
+    _add_warm_start_suffixes(m)
+    return m
+
+
+def build_discharge_model(heat_duty=DESIGN_HEAT_DUTY, **design_point):
+    """
+    Build and initialize the discharge heat exchanger (thermal oil heats
+    steam).
+
+    Args:
+        heat_duty: heat duty [W] fixed after initialization
+        design_point: operating point keys (see module docstring) that
+                      replace those of DISCHARGE_DESIGN_POINT for
+                      initialization
+
+    Returns:
+        model with the heat duty fixed and the area free
+    """
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.steam_prop = Iapws95ParameterBlock()
+    m.fs.therminol66_prop = ThermalOilParameterBlock()
+    m.fs.discharge_hx = HeatExchanger(
+        default={"hot_side_name": "tube", "cold_side_name": "shell",
+                 "tube": {"property_package": m.fs.therminol66_prop},
+                 "shell": {"property_package": m.fs.steam_prop},
+                 "flow_pattern": HeatExchangerFlowPattern.countercurrent})
+
+    set_operating_point(m, **dict(DISCHARGE_DESIGN_POINT, **design_point))
+    m.fs.discharge_hx.initialize()
+    m.fs.discharge_hx.heat_duty.fix(heat_duty)
+    m.fs.discharge_hx.area.unfix()
+    _add_warm_start_suffixes(m)
+    return m
+
+
+def _hx_ports(m):
+    for name, steam, oil in _HX_SIDES.values():
+        hx = getattr(m.fs, name, None)
+        if hx is not None:
+            return (hx,
+                    getattr(hx, "inlet_%d" % steam),
+                    getattr(hx, "outlet_%d" % steam),
+                    getattr(hx, "inlet_%d" % oil),
+                    getattr(hx, "outlet_%d" % oil))
+    raise ValueError("Model has no charge or discharge heat exchanger")
+
+
+def set_operating_point(m, **point):
+    """
+    Fix the inputs of a heat exchanger model built by build_charge_model or
+    build_discharge_model to an operating point (see module docstring).
+    """
+    hx, steam_in, _, oil_in, _ = _hx_ports(m)
+    point = dict(point)
+    if "steam_flow_mol" in point:
+        steam_in.flow_mol[0].fix(point.pop("steam_flow_mol"))
+    if "steam_pressure" in point:
+        steam_in.pressure[0].fix(point.pop("steam_pressure"))
+    if "steam_temperature" in point:
+        pressure = value(steam_in.pressure[0])
+        steam_in.enth_mol[0].fix(
+            htpx(T=point.pop("steam_temperature")*units.K,
+                 P=pressure*units.Pa))
+    if "oil_flow_mass" in point:
+        oil_in.flow_mass[0].fix(point.pop("oil_flow_mass"))
+    if "oil_temperature" in point:
+        oil_in.temperature[0].fix(point.pop("oil_temperature"))
+    if "oil_pressure" in point:
+        oil_in.pressure[0].fix(point.pop("oil_pressure"))
+    for name in ("heat_duty", "area", "overall_heat_transfer_coefficient"):
+        if name in point:
+            var = getattr(hx, name)
+            var = var[0] if var.is_indexed() else var
+            var.fix(point.pop(name))
+    if point:
+        raise KeyError("Unknown operating point keys: %s" %
+                       ", ".join(sorted(point)))
+
+
+def get_results(m):
+    """
+    Outputs of a solved heat exchanger model, as a dict of floats with the
+    keys in RESULT_NAMES.
+    """
+    hx, _, steam_out, _, oil_out = _hx_ports(m)
+    results = (value(hx.heat_duty[0]),
+               value(hx.area),
+               value(hx.overall_heat_transfer_coefficient[0]),
+               value(steam_out.enth_mol[0]),
+               value(oil_out.temperature[0]))
+    return dict(zip(RESULT_NAMES, results))
+
+
+def solve_sweep(m, points, solver=None, warm_start=True, tee=False):
+    """
+    Re-solve a heat exchanger model at each operating point in turn.
+
+    Each solve starts from the previous converged solution; if warm_start is
+    True, ipopt is also given the previous bound multipliers. Points solved
+    before are restored from the active SolutionCache, if any. After a failed
+    solve the last converged solution is restored before the next point.
+
+    Args:
+        m: model from build_charge_model or build_discharge_model
+        points: iterable of operating point dicts
+        solver: solver object (default: get_solver())
+        warm_start: whether to pass ipopt warm-start options and multipliers
+                    (only used with the ipopt executable)
+        tee: whether to show solver output
+
+    Yields:
+        For each point, a dict with the point, the solver termination
+        condition (or error message, if the solver raised) under
+        "termination", and the results of get_results
+    """
+    if solver is None:
+        solver = get_solver()
+    # only the ipopt executable takes the multipliers from the model suffixes
+    warm_start = warm_start and isinstance(getattr(solver, "backend", solver),
+                                           SystemCallSolver)
+    variables = list(m.component_data_objects(Var, descend_into=True))
+    saved = [v.value for v in variables]
+    warm = False
+    for point in points:
+        set_operating_point(m, **point)
+        options = _WARM_START_OPTIONS if warm_start and warm else {}
+        try:
+            with instrument(m.fs, "solve") as event:
+                res = cached_solve(m, lambda: solver.solve(
+                    m, tee=tee, options=options,
+                    **event.solve_kwargs(solver)))
+                event.record_results(res)
+            condition = res.solver.termination_condition
+        except Exception as err:
+            # e.g. ipopt stopping on a function evaluation error, or any
+            # error of an in-process backend; one point must not end a sweep
+            condition = "error: %s" % err
+        row = dict(point)
+        row["termination"] = str(condition)
+        row.update(get_results(m))
+        if condition == TerminationCondition.optimal:
+            saved = [v.value for v in variables]
+            m.ipopt_zL_in.update(m.ipopt_zL_out)
+            m.ipopt_zU_in.update(m.ipopt_zU_out)
+            warm = True
+        else:
+            for v, val in zip(variables, saved):
+                v.value = val
+        yield row
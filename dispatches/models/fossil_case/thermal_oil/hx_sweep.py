@@ -0,0 +1,157 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Parallel operating-point sweeps of the thermal oil heat exchangers.
+
+The grid of operating points is split into chunks that are solved in a pool
+of worker processes. Each worker builds its heat exchanger model once and
+re-solves it, warm-started, for every point it is given. Result rows are
+written to a CSV or Parquet file as each chunk finishes.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import itertools
+import os
+
+from dispatches.models.fossil_case.thermal_oil.hx_flowsheets import (
+    build_charge_model,
+    build_discharge_model,
+    RESULT_NAMES,
+    solve_sweep)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+_BUILDERS = {"charge": build_charge_model,
+             "discharge": build_discharge_model}
+
+# Model of the current worker process
+_worker_model = None
+
+
+def grid(**axes):
+    """
+    Full factorial grid of operating points.
+
+    Example:
+        grid(heat_duty=[1e8, 1.1e8], oil_flow_mass=[800, 833.3])
+
+    Returns:
+        list of operating point dicts
+    """
+    names = list(axes)
+    return [dict(zip(names, values))
+            for values in itertools.product(*axes.values())]
+
+
+def _init_worker(mode):
+    global _worker_model
+    _worker_model = _BUILDERS[mode]()
+
+
+def _solve_chunk(indexed_points):
+    rows = list(solve_sweep(_worker_model, [p for _, p in indexed_points]))
+    for (index, _), row in zip(indexed_points, rows):
+        row["index"] = index
+    return rows
+
+
+def _fieldnames(points):
+    # every key a row can have, known before the first chunk finishes
+    names = {}
+    for point in points:
+        names.update(dict.fromkeys(point))
+    names.update(dict.fromkeys(("termination",) + RESULT_NAMES + ("index",)))
+    return list(names)
+
+
+class _CSVWriter:
+    def __init__(self, path, fieldnames):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, fieldnames):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required to write Parquet files")
+        self._schema = pyarrow.schema(
+            [(name, pyarrow.string() if name == "termination" else
+              pyarrow.int64() if name == "index" else pyarrow.float64())
+             for name in fieldnames])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        # points without some of the keys get nulls
+        self._writer.write_table(pyarrow.Table.from_pylist(rows,
+                                                           self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def run_sweep(mode, points, output, max_workers=None, chunk_size=8):
+    """
+    Solve a heat exchanger model at many operating points in parallel.
+
+    Args:
+        mode: "charge" or "discharge"
+        points: list of operating point dicts (see hx_flowsheets); every
+                point must leave the model with zero degrees of freedom
+        output: path of the results file; written as Parquet if it ends in
+                .parquet (requires pyarrow), otherwise as CSV
+        max_workers: number of worker processes (default: number of CPUs)
+        chunk_size: number of points sent to a worker at a time; points in
+                    a chunk are solved in order, each warm-started from
+                    the previous one
+
+    Returns:
+        number of rows written. Rows are written in completion order and
+        have an "index" column giving the position of the point in points.
+    """
+    if mode not in _BUILDERS:
+        raise ValueError("mode must be one of %s" % ", ".join(_BUILDERS))
+    indexed = list(enumerate(points))
+    chunks = [indexed[i:i + chunk_size]
+              for i in range(0, len(indexed), chunk_size)]
+    fieldnames = _fieldnames(p for _, p in indexed)
+    if os.fspath(output).endswith(".parquet"):
+        writer = _ParquetWriter(output, fieldnames)
+    else:
+        writer = _CSVWriter(output, fieldnames)
+    count = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_worker,
+                                 initargs=(mode,)) as pool:
+            futures = [pool.submit(_solve_chunk, c) for c in chunks]
+            for future in as_completed(futures):
+                rows = future.result()
+                writer.write(rows)
+                count += len(rows)
+    finally:
+        writer.close()
+    return count
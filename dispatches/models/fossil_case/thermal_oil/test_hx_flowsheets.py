@@ -0,0 +1,121 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for the reusable thermal oil heat exchanger flowsheets
+"""
+import csv
+
+import pytest
+from idaes.core.util.model_statistics import degrees_of_freedom
+from dispatches.models.fossil_case.thermal_oil.hx_flowsheets import (
+    build_charge_model,
+    build_discharge_model,
+    set_operating_point,
+    solve_sweep)
+from dispatches.models.fossil_case.thermal_oil.hx_sweep import grid, run_sweep
+
+
+def test_charge_sweep():
+    m = build_charge_model()
+    assert degrees_of_freedom(m) == 0
+
+    points = [{"heat_duty": 1.066e+08},
+              {"heat_duty": 1.0e+08, "oil_flow_mass": 800},
+              {"heat_duty": 1.1e+08, "steam_flow_mol": 4300}]
+    rows = list(solve_sweep(m, points))
+
+    assert [r["termination"] for r in rows] == ["optimal"] * 3
+    # same results as charge_heat_exchanger.py
+    assert rows[0]["oil_outlet_temperature"] == pytest.approx(528.83, rel=1e-1)
+    assert rows[0]["steam_outlet_enth_mol"] == pytest.approx(27100.28, rel=1e-1)
+    assert rows[1]["heat_duty"] == pytest.approx(1.0e+08)
+    assert rows[1]["oil_flow_mass"] == 800
+
+
+def test_discharge_sweep():
+    m = build_discharge_model()
+    assert degrees_of_freedom(m) == 0
+
+    rows = list(solve_sweep(m, [{"heat_duty": 1.066e+08},
+                                {"oil_temperature": 260 + 273.15}]))
+
+    assert [r["termination"] for r in rows] == ["optimal"] * 2
+    # same results as discharge_heat_exchanger.py
+    assert rows[0]["oil_outlet_temperature"] == pytest.approx(473.5, rel=1e-1)
+    assert rows[0]["steam_outlet_enth_mol"] == pytest.approx(27668.5, rel=1e-1)
+
+
+def test_design_point_arguments():
+    m = build_discharge_model(heat_duty=1.0e+08, oil_flow_mass=800,
+                              oil_temperature=260 + 273.15)
+    assert degrees_of_freedom(m) == 0
+    assert m.fs.discharge_hx.heat_duty[0].value == pytest.approx(1.0e+08)
+    assert m.fs.discharge_hx.inlet_1.flow_mass[0].value == 800
+    assert m.fs.discharge_hx.inlet_1.temperature[0].value == 260 + 273.15
+    assert not m.fs.discharge_hx.area.fixed
+    with pytest.raises(KeyError):
+        build_charge_model(oil_temprature=500)
+
+
+def test_unknown_operating_point_key():
+    m = build_charge_model()
+    with pytest.raises(KeyError):
+        set_operating_point(m, steam_temprature=500)
+
+
+def test_parallel_sweep(tmp_path):
+    points = grid(heat_duty=[1.0e+08, 1.066e+08], oil_flow_mass=[800, 833.3])
+    assert len(points) == 4
+    output = tmp_path / "sweep.csv"
+
+    assert run_sweep("charge", points, output, max_workers=2,
+                     chunk_size=2) == 4
+
+    with open(output, newline="") as f:
+        rows = sorted(csv.DictReader(f), key=lambda r: int(r["index"]))
+    assert [r["termination"] for r in rows] == ["optimal"] * 4
+    assert float(rows[3]["oil_flow_mass"]) == 833.3
+    assert float(rows[3]["heat_duty"]) == pytest.approx(1.066e+08)
+
+
+def test_parallel_sweep_mixed_keys(tmp_path):
+    # points with different keys, finishing in any order
+    points = [{"heat_duty": 1.0e+08}, {"oil_flow_mass": 800},
+              {"heat_duty": 1.05e+08, "steam_flow_mol": 4300}]
+    output = tmp_path / "sweep.csv"
+
+    assert run_sweep("charge", points, output, max_workers=2,
+                     chunk_size=1) == 3
+
+    with open(output, newline="") as f:
+        reader = csv.DictReader(f)
+        rows = sorted(reader, key=lambda r: int(r["index"]))
+    assert reader.fieldnames[:3] == ["heat_duty", "oil_flow_mass",
+                                     "steam_flow_mol"]
+    assert rows[0]["steam_flow_mol"] == ""
+    assert float(rows[2]["steam_flow_mol"]) == 4300
+
+
+def test_sweep_records_solver_errors():
+    class FailingSolver:
+        backend = None
+
+        def solve(self, m, **kwargs):
+            raise RuntimeError("solver crashed")
+
+    m = build_charge_model()
+    rows = list(solve_sweep(m, [{"heat_duty": 1.0e+08}],
+                            solver=FailingSolver()))
+    assert rows[0]["termination"] == "error: solver crashed"
@@ -20,10 +20,18 @@ Reference: “Therminol 66: High Performance Highly Stable Heat Transfer Fluid,
 ” Applied Chemistry, Creative Solutions, Solutia, Inc., St. Louis, Missouri;
 https://www.therminol.com.
 """
+import numpy as np
 import pytest
-from pyomo.environ import ConcreteModel, value, SolverFactory
+from pyomo.environ import ConcreteModel, Constraint, value
 from idaes.core import FlowsheetBlock
-from thermal_oil import ThermalOilParameterBlock
+from idaes.core.util.model_statistics import degrees_of_freedom
+from dispatches.models.util.instrumentation import Collector
+from dispatches.models.util.solvers import get_solver
+from dispatches.models.fossil_case.thermal_oil.thermal_oil import (
+    ThermalOilParameterBlock,
+    evaluate_enthalpy_flow,
+    evaluate_properties,
+    fit_linear_surrogates)
 
 
 m = ConcreteModel()
@@ -51,7 +59,7 @@ assert value(m.fs.state[0].density) == pytest.approx(1008.4, rel=1e-1)
 # Try another temperature
 m.fs.state[0].temperature.fix(273.15+180)
 
-solver = SolverFactory('ipopt')
+solver = get_solver()
 solver.solve(m.fs)
 
 assert value(m.fs.state[0].cp_mass) == pytest.approx(2122, rel=1e-1)
@@ -62,10 +70,157 @@ assert value(m.fs.state[0].density) == pytest.approx(899.5, rel=1e-1)
 # Try another temperature
 m.fs.state[0].temperature.fix(273.15+350)
 
-solver = SolverFactory('ipopt')
+solver = get_solver()
 solver.solve(m.fs)
 
 assert value(m.fs.state[0].cp_mass) == pytest.approx(2766, rel=1e-1)
 assert value(m.fs.state[0].therm_cond) == pytest.approx(0.088369, rel=1e-1)
 assert value(m.fs.state[0].visc_kin) == pytest.approx(0.42, rel=1e-1)
 assert value(m.fs.state[0].density) == pytest.approx(765.9, rel=1e-1)
+
+
+def test_evaluate_properties():
+    # Same table values as above, evaluated in one vectorized call
+    props = evaluate_properties(273.15 + np.array([20, 180, 350]))
+    assert props["cp_mass"] == pytest.approx([1562, 2122, 2766], rel=1e-1)
+    assert props["therm_cond"] == pytest.approx(
+        [0.117574, 0.107494, 0.088369], rel=1e-1)
+    assert props["visc_kin"] == pytest.approx([122.45, 1.17, 0.42], rel=1e-1)
+    assert props["density"] == pytest.approx([1008.4, 899.5, 765.9], rel=1e-1)
+    # Enthalpy is the integral of cp from 0 C
+    h = props["enth_mass"]
+    assert h[2] - h[1] == pytest.approx(
+        (props["cp_mass"][1] + props["cp_mass"][2]) / 2 * 170, rel=1e-2)
+    assert evaluate_enthalpy_flow([2, 2, 2], 273.15 + np.array([20, 180, 350])) \
+        == pytest.approx(2 * h)
+
+
+def test_initialize_closed_form():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False, "time_set": [0, 1, 2]})
+    m.fs.therminol66_prop = ThermalOilParameterBlock()
+    m.fs.state = m.fs.therminol66_prop.build_state_block(
+        m.fs.config.time, default={"defined_state": True})
+
+    temperature = [273.15 + 20, 273.15 + 180, 273.15 + 350]
+    for t, T in zip(m.fs.config.time, temperature):
+        m.fs.state[t].flow_mass.fix(1)
+        m.fs.state[t].temperature.fix(T)
+        m.fs.state[t].pressure.fix(101325)
+
+    # No solver is needed, so an unknown one is never called
+    m.fs.state.initialize(solver="not-a-solver")
+
+    props = evaluate_properties(temperature)
+    for i, t in enumerate(m.fs.config.time):
+        for name in ("cp_mass", "visc_kin", "therm_cond", "density"):
+            assert value(getattr(m.fs.state[t], name)) == pytest.approx(
+                props[name][i], rel=1e-10)
+
+
+def test_initialize_chunks():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False,
+                                   "time_set": [0, 1, 2, 3, 4]})
+    m.fs.therminol66_prop = ThermalOilParameterBlock()
+    m.fs.state = m.fs.therminol66_prop.build_state_block(
+        m.fs.config.time, default={"defined_state": True})
+
+    temperature = 273.15 + np.linspace(20, 350, 5)
+    for t, T in zip(m.fs.config.time, temperature):
+        m.fs.state[t].flow_mass.fix(1)
+        m.fs.state[t].temperature.fix(T)
+        m.fs.state[t].pressure.fix(101325)
+
+    assert list(m.fs.state._degrees_of_freedom()) == [0] * 5
+    m.fs.state[1].cp_mass.fix(2000)
+    m.fs.state[3].eq_density.deactivate()
+    m.fs.state[4].temperature.unfix()
+    assert list(m.fs.state._degrees_of_freedom()) == \
+        [degrees_of_freedom(m.fs.state[t]) for t in m.fs.config.time] == \
+        [0, -1, 0, 0, 1]
+    m.fs.state[1].cp_mass.unfix()
+    m.fs.state[3].eq_density.activate()
+    m.fs.state[4].temperature.fix()
+
+    # solved in chunks of 2 time points; each solve only sees its chunk
+    with Collector() as events:
+        m.fs.state.initialize(state_vars_fixed=True, closed_form=False,
+                              chunk_size=2)
+    assert all(b.active for b in m.fs.state.values())
+    solves = [e for e in events.events if e["phase"] == "solve"]
+    assert [e["block"] for e in solves] == ["fs.state"] * 3
+    assert solves[0]["n_variables"] == solves[1]["n_variables"] == \
+        2 * solves[2]["n_variables"]
+    props = evaluate_properties(temperature)
+    for i, t in enumerate(m.fs.config.time):
+        assert value(m.fs.state[t].cp_mass) == pytest.approx(
+            props["cp_mass"][i], rel=1e-6)
+
+
+def test_fit_linear_surrogates():
+    fits = fit_linear_surrogates((300, 500))
+    temperature = np.linspace(300, 500, 37)
+    exact = evaluate_properties(temperature)
+    for name, fit in fits.items():
+        error = np.abs(fit["intercept"] + fit["slope"] * temperature -
+                       exact[name])
+        assert (error <= fit["max_abs_error"] * (1 + 1e-9)).all()
+    # cp is nearly linear in temperature, viscosity is not
+    assert fits["cp_mass"]["max_rel_error"] < 1e-2
+    assert fits["visc_kin"]["max_rel_error"] > 0.1
+    with pytest.raises(ValueError):
+        fit_linear_surrogates((500, 300))
+
+
+def test_linear_property_mode():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False, "time_set": [0, 1]})
+    m.fs.therminol66_prop = ThermalOilParameterBlock(
+        default={"property_mode": "linear",
+                 "temperature_window": (400, 500),
+                 "properties": ["cp_mass", "density"]})
+    m.fs.state = m.fs.therminol66_prop.build_state_block(
+        m.fs.config.time, default={"defined_state": True})
+
+    params = m.fs.therminol66_prop
+    assert set(params.surrogate_errors) == {"cp_mass", "visc_kin",
+                                            "therm_cond", "density",
+                                            "enth_mass"}
+    assert m.fs.state[0].temperature.bounds == (400, 500)
+    assert not hasattr(m.fs.state[0], "visc_kin")
+    assert not hasattr(m.fs.state[0], "eq_visc")
+
+    for t, T in zip(m.fs.config.time, [420, 480]):
+        m.fs.state[t].flow_mass.fix(2)
+        m.fs.state[t].temperature.fix(T)
+        m.fs.state[t].pressure.fix(101325)
+    m.fs.state.initialize(solver="not-a-solver")
+
+    exact = evaluate_properties([420, 480])
+    for i, t in enumerate(m.fs.config.time):
+        for name in ("cp_mass", "density"):
+            assert value(getattr(m.fs.state[t], name)) == pytest.approx(
+                exact[name][i], abs=params.surrogate_errors[name][0])
+        assert value(m.fs.state[t].get_enthalpy_flow_terms("Liq")) == \
+            pytest.approx(evaluate_enthalpy_flow(2, [420, 480][i]),
+                          abs=2 * params.surrogate_errors["enth_mass"][0])
+
+
+def test_no_properties():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.therminol66_prop = ThermalOilParameterBlock(
+        default={"properties": []})
+    m.fs.state = m.fs.therminol66_prop.build_state_block(
+        m.fs.config.time, default={"defined_state": True})
+
+    assert m.fs.therminol66_prop.property_names == []
+    for name in ("cp_mass", "visc_kin", "therm_cond", "density"):
+        assert not hasattr(m.fs.state[0], name)
+    assert list(m.fs.state[0].component_objects(Constraint)) == []
+    # the enthalpy is still available for the energy balance
+    m.fs.state[0].flow_mass.fix(2)
+    m.fs.state[0].temperature.fix(420)
+    assert value(m.fs.state[0].get_enthalpy_flow_terms("Liq")) == \
+        pytest.approx(evaluate_enthalpy_flow(2, 420))
@@ -19,17 +19,22 @@ Date: 01/20/2021
 Source: Therminol 66, High Performance Highly Stable Heat Transfer Fluid (0C to 345C), Solutia.
 """
 
+import numpy as np
+
 # Import Pyomo libraries
-from pyomo.environ import (Constraint,
+from pyomo.environ import (Block,
+                           Constraint,
                            NonNegativeReals,
                            Param,
                            PositiveReals,
                            Reals,
+                           Reference,
                            units,
                            value,
                            Var,
-                           exp,
-                           SolverFactory)
+                           exp)
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.common.config import ConfigValue, In
 
 # Import IDAES cores
 from idaes.core import (declare_process_block_class,
@@ -46,6 +51,10 @@ from idaes.core.util.initialization import solve_indexed_blocks, \
     fix_state_vars, revert_state_vars
 import idaes.logger as idaeslog
 
+from dispatches.models.util.instrumentation import instrument
+from dispatches.models.util.solution_cache import cached_solve
+from dispatches.models.util.solvers import get_solver
+
 # Some more inforation about this module
 __author__ = "Jaffer Ghouse, Konor Frick"
 
@@ -54,12 +63,161 @@ __author__ = "Jaffer Ghouse, Konor Frick"
 _log = idaeslog.getLogger(__name__)
 
 
+# Property correlations, in terms of the temperature t in degrees C. These
+# work on Pyomo expressions as well as on NumPy arrays, and are shared by the
+# state block constraints and the NumPy evaluators below.
+def _cp_mass(t):
+    return 1e3 * (0.003313 * t + 0.0000008970785 * t**2 + 1.496005)
+
+
+def _visc_kin(t, exp=exp):
+    return exp(586.375 / (t + 62.5) - 2.2809)
+
+
+def _therm_cond(t):
+    return -0.000033 * t - 0.00000015 * t**2 + 0.118294
+
+
+def _density(t):
+    return -0.614254 * t - 0.000321 * t + 1020.62
+
+
+def _enth_mass(t):
+    return 1e3 * (0.003313 * t**2 / 2 + 0.0000008970785 * t**3 / 3 +
+                  1.496005 * t)
+
+
+# Property variables of the state block and the constraints defining them
+_property_constraints = {"cp_mass": "eq_cp",
+                         "visc_kin": "eq_visc",
+                         "therm_cond": "eq_therm_cond",
+                         "density": "eq_density"}
+
+# Correlation, initial value and doc of each property variable
+_property_vars = {"cp_mass": (_cp_mass, 100,
+                              "specific heat capacity [J/Kg/K]"),
+                  "visc_kin": (_visc_kin, 1, "kinematic viscosity [mm2/s]"),
+                  "therm_cond": (_therm_cond, 100,
+                                 "thermal conductivity [W/m/K]"),
+                  "density": (_density, 1000,
+                              "density of the thermal oil [Kg/m3]")}
+
+
+def evaluate_properties(temperature):
+    """
+    Evaluate the Therminol-66 property correlations with NumPy, without
+    building or solving a model.
+
+    Args:
+        temperature: temperature(s) [K], scalar or array-like
+
+    Returns:
+        dict of arrays with the same shape as temperature, with keys
+        cp_mass [J/kg/K], visc_kin [mm2/s], therm_cond [W/m/K],
+        density [kg/m3] and enth_mass [J/kg]
+    """
+    t = np.asarray(temperature, dtype=np.float64) - 273.15
+    return {"cp_mass": _cp_mass(t),
+            "visc_kin": _visc_kin(t, exp=np.exp),
+            "therm_cond": _therm_cond(t),
+            "density": _density(t),
+            "enth_mass": _enth_mass(t)}
+
+
+def fit_linear_surrogates(temperature_window, points=1001):
+    """
+    Least-squares linear fits of the property correlations and the specific
+    enthalpy over a temperature window.
+
+    Args:
+        temperature_window: (min, max) temperature [K]
+        points: number of temperatures the fits and errors are evaluated at
+
+    Returns:
+        dict with the keys of evaluate_properties, of dicts with keys
+        intercept and slope (value = intercept + slope * temperature [K]),
+        max_abs_error (in the units of the property) and max_rel_error
+        (max_abs_error relative to the largest value in the window)
+    """
+    t_min, t_max = temperature_window
+    if not t_min < t_max:
+        raise ValueError("temperature_window must be (min, max) with "
+                         "min < max, got {}".format(temperature_window))
+    temperature = np.linspace(t_min, t_max, points)
+    fits = {}
+    for name, values in evaluate_properties(temperature).items():
+        slope, intercept = np.polyfit(temperature, values, 1)
+        error = np.abs(intercept + slope * temperature - values).max()
+        fits[name] = {"intercept": float(intercept),
+                      "slope": float(slope),
+                      "max_abs_error": float(error),
+                      "max_rel_error": float(error / np.abs(values).max())}
+    return fits
+
+
+def _temperature_window(window):
+    t_min, t_max = (float(t) for t in window)
+    if not t_min < t_max:
+        raise ValueError("temperature_window must be (min, max) with "
+                         "min < max")
+    return (t_min, t_max)
+
+
+def _property_list(names):
+    if names is None:
+        return None
+    names = list(names)
+    unknown = set(names) - set(_property_constraints)
+    if unknown:
+        raise ValueError("Unknown thermal oil properties: {}".format(
+            ", ".join(sorted(unknown))))
+    return names
+
+
+def evaluate_enthalpy_flow(flow_mass, temperature):
+    """
+    NumPy counterpart of ThermalOilStateBlockData.get_enthalpy_flow_terms.
+
+    Args:
+        flow_mass: mass flow(s) [kg/s], scalar or array-like
+        temperature: temperature(s) [K], scalar or array-like
+
+    Returns:
+        enthalpy flow(s) [J/s], broadcast over flow_mass and temperature
+    """
+    t = np.asarray(temperature, dtype=np.float64) - 273.15
+    return np.asarray(flow_mass, dtype=np.float64) * _enth_mass(t)
+
+
 @declare_process_block_class("ThermalOilParameterBlock")
 class PhysicalParameterData(PhysicalParameterBlock):
     """
     Property Parameter Block Class
 
     """
+    CONFIG = PhysicalParameterBlock.CONFIG()
+    CONFIG.declare("property_mode", ConfigValue(
+        default="full",
+        domain=In(["full", "linear"]),
+        description="Form of the property correlations",
+        doc="""**"full"** - the nonlinear Therminol-66 correlations (default),
+**"linear"** - linear fits of the correlations, and of the specific
+enthalpy, over temperature_window. The temperature of the state blocks is
+bounded to the window, and the fit errors are in the surrogate_errors
+attribute of the parameter block."""))
+    CONFIG.declare("temperature_window", ConfigValue(
+        default=(260, 616),
+        domain=_temperature_window,
+        description="Temperature range [K] of the linear surrogates"))
+    CONFIG.declare("properties", ConfigValue(
+        default=None,
+        domain=_property_list,
+        description="Property variables to build",
+        doc="""List of the property variables (cp_mass, visc_kin,
+therm_cond, density) and constraints to build in each state block; the
+others are skipped. Default is all of them; an empty list builds none, which
+is enough for a steady-state heat exchanger. Dynamic models need cp_mass and
+density."""))
 
     def build(self):
         '''
@@ -67,6 +225,20 @@ class PhysicalParameterData(PhysicalParameterBlock):
         '''
         super(PhysicalParameterData, self).build()
 
+        self.surrogates = None
+        self.surrogate_errors = None
+        if self.config.property_mode == "linear":
+            self.surrogates = fit_linear_surrogates(
+                self.config.temperature_window)
+            self.surrogate_errors = {
+                name: (fit["max_abs_error"], fit["max_rel_error"])
+                for name, fit in self.surrogates.items()}
+            t_min, t_max = self.config.temperature_window
+            for name, (abs_error, rel_error) in self.surrogate_errors.items():
+                _log.info("{} linear {} over {}-{} K: max error {:.4g} "
+                          "({:.2%})".format(self.name, name, t_min, t_max,
+                                            abs_error, rel_error))
+
         self._state_block_class = ThermalOilStateBlock
 
         # Add Phase objects
@@ -91,6 +263,36 @@ class PhysicalParameterData(PhysicalParameterBlock):
                                'amount': units.mol,
                                'temperature': units.K})
 
+    @property
+    def property_names(self):
+        """Names of the property variables built in the state blocks."""
+        if self.config.properties is None:
+            return list(_property_constraints)
+        return self.config.properties
+
+    def evaluate_properties(self, temperature):
+        """
+        Like the module-level evaluate_properties, but with the linear
+        surrogates if property_mode is "linear".
+        """
+        if self.surrogates is None:
+            return evaluate_properties(temperature)
+        t = np.asarray(temperature, dtype=np.float64)
+        return {name: fit["intercept"] + fit["slope"] * t
+                for name, fit in self.surrogates.items()}
+
+    def property_expression(self, name, temperature):
+        """
+        Pyomo expression of a property (or "enth_mass") in terms of a
+        temperature [K], in the form set by property_mode.
+        """
+        if self.surrogates is None:
+            if name == "enth_mass":
+                return _enth_mass(temperature - 273.15)
+            return _property_vars[name][0](temperature - 273.15)
+        fit = self.surrogates[name]
+        return fit["intercept"] + fit["slope"] * temperature
+
 
 class _StateBlock(StateBlock):
     """
@@ -100,7 +302,8 @@ class _StateBlock(StateBlock):
     def initialize(self, state_args={}, state_vars_fixed=False,
                    hold_state=False, outlvl=idaeslog.NOTSET,
                    temperature_bounds=(260, 616),
-                   solver='ipopt', optarg={'tol': 1e-8}):
+                   solver='ipopt', optarg={'tol': 1e-8},
+                   closed_form=True, chunk_size=None):
         '''
         Initialization routine for property package.
 
@@ -139,11 +342,28 @@ class _StateBlock(StateBlock):
                         - False - state variables are unfixed after
                                  initialization by calling the
                                  relase_state method
+            closed_form : flag indicating whether to compute the property
+                          variables directly from the fixed temperatures
+                          (default=True). The solver is then only called if
+                          the property constraints are not satisfied by
+                          the computed values, e.g. when a property
+                          variable is fixed.
+            chunk_size : number of time points solved together when the
+                         solver is needed (default=None, all at once). The
+                         state blocks are independent, so smaller chunks
+                         give smaller NLPs for long horizons.
 
         Returns:
             If hold_states is True, returns a dict containing flags for
             which states were fixed during initialization.
         '''
+        with instrument(self, "initialize"):
+            return self._initialize(state_args, state_vars_fixed, hold_state,
+                                    outlvl, solver, optarg, closed_form,
+                                    chunk_size)
+
+    def _initialize(self, state_args, state_vars_fixed, hold_state, outlvl,
+                    solver, optarg, closed_form, chunk_size):
         init_log = idaeslog.getInitLogger(self.name, outlvl, tag="properties")
         solve_log = idaeslog.getSolveLogger(self.name, outlvl,
                                             tag="properties")
@@ -154,25 +374,29 @@ class _StateBlock(StateBlock):
 
         else:
             # Check when the state vars are fixed already result in dof 0
-            for k in self.keys():
-                if degrees_of_freedom(self[k]) != 0:
-                    raise Exception("State vars fixed but degrees of freedom "
-                                    "for state block is not zero during "
-                                    "initialization.")
+            if (self._degrees_of_freedom() != 0).any():
+                raise Exception("State vars fixed but degrees of freedom "
+                                "for state block is not zero during "
+                                "initialization.")
 
         if optarg is None:
             sopt = {"tol": 1e-8}
         else:
             sopt = optarg
 
-        opt = SolverFactory(solver)
-
-        opt.options = sopt
+        if closed_form and self._initialize_closed_form(sopt.get("tol", 1e-8)):
+            init_log.info("Initialization Step 1 closed-form.")
+        else:
+            opt = get_solver(solver, sopt)
 
-        with idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc:
-            res = solve_indexed_blocks(opt, [self], tee=slc.tee)
-        init_log.info("Initialization Step 1 {}.".
-                      format(idaeslog.condition(res)))
+            for chunk in self._chunks(chunk_size):
+                with instrument(chunk, "solve") as event, \
+                        idaeslog.solver_log(solve_log, idaeslog.DEBUG) as slc:
+                    res = cached_solve(chunk, lambda: self._solve_chunk(
+                        opt, chunk, tee=slc.tee, **event.solve_kwargs(opt)))
+                    event.record_results(res)
+                init_log.info("Initialization Step 1 {}.".
+                              format(idaeslog.condition(res)))
 
         if state_vars_fixed is False:
             if hold_state is True:
@@ -182,6 +406,87 @@ class _StateBlock(StateBlock):
 
         init_log.info('Initialization Complete.')
 
+    def _chunks(self, chunk_size):
+        blocks = list(self.values())
+        if not chunk_size or chunk_size >= len(blocks):
+            return [blocks]
+        return [blocks[i:i + chunk_size]
+                for i in range(0, len(blocks), chunk_size)]
+
+    def _solve_chunk(self, opt, chunk, **kwargs):
+        if len(chunk) == len(self):
+            return solve_indexed_blocks(opt, [self], **kwargs)
+        # solve a temporary block that references only the blocks in chunk,
+        # so the other blocks are not visited by the solver interface
+        tmp = Block(concrete=True)
+        tmp.states = Reference({b.index(): b for b in chunk}, ctype=Block)
+        return opt.solve(tmp, **kwargs)
+
+    def _degrees_of_freedom(self):
+        '''
+        Degrees of freedom of every state block, as an array.
+
+        All state blocks are built the same way, so the variables in each
+        constraint are only looked up in the first one; the fixed and active
+        flags of all blocks are then counted with NumPy. This gives the same
+        result as calling degrees_of_freedom on each block.
+        '''
+        blocks = list(self.values())
+        first = blocks[0]
+        incidence = {}
+        for con in first.component_objects(Constraint, descend_into=False):
+            if con.is_indexed() or not con.equality:
+                return np.array([degrees_of_freedom(b) for b in blocks])
+            names = set()
+            for v in identify_variables(con.expr):
+                if v.parent_block() is not first or v.is_indexed() \
+                        or v.parent_component() is not v:
+                    return np.array([degrees_of_freedom(b) for b in blocks])
+                names.add(v.local_name)
+            incidence[con.local_name] = names
+        if not incidence:
+            return np.zeros(len(blocks), dtype=np.int64)
+        var_names = sorted(set().union(*incidence.values()))
+        # constraint x variable incidence matrix
+        incidence_matrix = np.array([[v in incidence[c] for v in var_names]
+                                     for c in incidence], dtype=np.int64)
+        active = np.array([[getattr(b, c).active for c in incidence]
+                           for b in blocks], dtype=np.int64)
+        free = np.array([[not getattr(b, v).fixed for v in var_names]
+                         for b in blocks], dtype=bool)
+        # a variable counts if it appears in any active constraint
+        used = (active @ incidence_matrix) > 0
+        return (free & used).sum(axis=1) - active.sum(axis=1)
+
+    def _initialize_closed_form(self, tol):
+        '''
+        Set the property variables of all state blocks from their current
+        temperatures, using the NumPy correlations in a single vectorized call.
+
+        Returns:
+            True if every property constraint is then satisfied to within tol
+            (relative to the property value), otherwise False
+        '''
+        blocks = list(self.values())
+        temperature = np.array([b.temperature.value for b in blocks],
+                               dtype=np.float64)
+        if np.isnan(temperature).any():
+            return False
+        params = blocks[0].config.parameters
+        props = params.evaluate_properties(temperature)
+        for name in params.property_names:
+            con_name = _property_constraints[name]
+            values = props[name]
+            for i, b in enumerate(blocks):
+                var = getattr(b, name)
+                if not var.fixed:
+                    var.value = float(values[i])
+                con = getattr(b, con_name)
+                resid = value(con.body) - value(con.upper)
+                if abs(resid) > tol * max(1.0, abs(values[i])):
+                    return False
+        return True
+
     def release_state(self, flags, outlvl=idaeslog.NOTSET):
         '''
         Method to relase state variables fixed during initialization.
@@ -226,10 +531,16 @@ class ThermalOilStateBlockData(StateBlockData):
                              domain=NonNegativeReals,
                              doc="Total mass flow [Kg/s]",
                              units=units.kg/units.s)
-        self.temperature = Var(initialize=523,
+        params = self.config.parameters
+        if params.config.property_mode == "linear":
+            # the surrogates are only fitted over the temperature window
+            bounds = params.config.temperature_window
+        else:
+            bounds = (260, 616)
+        self.temperature = Var(initialize=min(max(523, bounds[0]), bounds[1]),
                                domain=NonNegativeReals,
                                doc="Temperature of thermal oil [K]",
-                               bounds=(260, 616),
+                               bounds=bounds,
                                units=units.K)
         self.pressure = Var(initialize=101325,
                             domain=NonNegativeReals,
@@ -237,54 +548,21 @@ class ThermalOilStateBlockData(StateBlockData):
                             units=units.Pa)
 
     def make_properties(self):
-        self.cp_mass = Var(initialize=100,
-                           domain=NonNegativeReals,
-                           doc="specific heat capacity [J/Kg/K]"
-                           )
-        self.therm_cond = Var(initialize=100,
-                              domain=NonNegativeReals,
-                              doc="thermal conductivity [W/m/K]")
-        self.visc_kin = Var(initialize=1,
-                            domain=NonNegativeReals,
-                            doc="kinematic viscosity [mm2/s]")
-        self.density = Var(initialize=1000,
-                           domain=NonNegativeReals,
-                           doc="density of the thermal oil [Kg/m3]")
-
-        def rule_cp(self):
-            return self.cp_mass == 1e3 * \
-                (0.003313 * (self.temperature - 273.15) +
-                 0.0000008970785 * (self.temperature - 273.15)**2
-                 + 1.496005)
-
-        self.eq_cp = Constraint(rule=rule_cp)
-
-        def rule_visc(self):
-            return self.visc_kin == \
-                exp(586.375 / (self.temperature - 273.15 + 62.5) - 2.2809)
-
-        self.eq_visc = Constraint(rule=rule_visc)
-
-        def rule_therm_cond(self):
-            return self.therm_cond == -0.000033 *\
-                (self.temperature - 273.15) - 0.00000015 * \
-                (self.temperature - 273.15)**2 + 0.118294
-
-        self.eq_therm_cond = Constraint(rule=rule_therm_cond)
-
-        def rule_density(self):
-            return self.density == -0.614254 * (self.temperature - 273.15) \
-                - 0.000321 * (self.temperature - 273.15) + 1020.62
-
-        self.eq_density = Constraint(rule=rule_density)
+        params = self.config.parameters
+        for name in params.property_names:
+            _, initialize, doc = _property_vars[name]
+            var = Var(initialize=initialize, domain=NonNegativeReals, doc=doc)
+            self.add_component(name, var)
+            self.add_component(_property_constraints[name], Constraint(
+                expr=var == params.property_expression(name,
+                                                       self.temperature)))
 
     def get_material_flow_terms(self, p, j):
         return self.flow_mass
 
     def get_enthalpy_flow_terms(self, p):
-        return self.flow_mass *1e3* (0.003313*(self.temperature-273.15)**2/2 +
-                                     0.0000008970785*(self.temperature-273.15)**3/3 +
-                                     1.496005*(self.temperature-273.15))
+        return self.flow_mass * self.config.parameters.property_expression(
+            "enth_mass", self.temperature)
 
     def get_material_density_terms(self, p, j):
         return self.density
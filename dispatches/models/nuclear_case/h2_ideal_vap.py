@@ -18,6 +18,8 @@ Ideal property package for H2 vapor
 # Import Python libraries
 import logging
 
+import numpy as np
+
 from pyomo.environ import units as pyunits
 
 # Import IDAES cores
@@ -89,3 +91,52 @@ configuration = {
                      "pressure": (5e4, 1e5, 1e6, pyunits.Pa)},
     "pressure_ref": (101325, pyunits.Pa),  # [2]
     "temperature_ref": (298.15, pyunits.K)}  # [2]
+
+
+# Gas constant [J/mol/K]
+_R = 8.314462618
+
+
+def shomate_coefficients(component="hydrogen", config=configuration):
+    """
+    Unitless NIST Shomate coefficients A-H of a component in a configuration
+    dictionary, in the units given there (J, mol, K and kK).
+    """
+    data = config["components"][component]["parameter_data"]
+    return {k: v[0] for k, v in data["cp_mol_ig_comp_coeff"].items()}
+
+
+def evaluate_properties(temperature, pressure=101325, component="hydrogen",
+                        config=configuration):
+    """
+    Evaluate ideal-gas properties of a pure component with NumPy, using the
+    same NIST Shomate expressions as the IDAES property package but without
+    building or solving a model.
+
+    Args:
+        temperature: temperature(s) [K], scalar or array-like
+        pressure: pressure(s) [Pa], scalar or array-like broadcastable with
+                  temperature
+        component: name of the component in config
+        config: property package configuration dictionary
+
+    Returns:
+        dict of arrays with keys cp_mol [J/mol/K], enth_mol [J/mol],
+        entr_mol [J/mol/K] and gibbs_mol [J/mol]
+    """
+    c = shomate_coefficients(component, config)
+    T = np.asarray(temperature, dtype=np.float64)
+    P = np.asarray(pressure, dtype=np.float64)
+    t = T / 1000  # Shomate temperatures are in kK
+    p_ref = config["pressure_ref"][0]
+
+    cp_mol = c["A"] + c["B"]*t + c["C"]*t**2 + c["D"]*t**3 + c["E"]/t**2
+    enth_mol = 1e3 * (c["A"]*t + c["B"]*t**2/2 + c["C"]*t**3/3 +
+                      c["D"]*t**4/4 - c["E"]/t + c["F"] - c["H"])
+    entr_mol = (c["A"]*np.log(t) + c["B"]*t + c["C"]*t**2/2 + c["D"]*t**3/3
+                - c["E"]/(2*t**2) + c["G"] - _R*np.log(P/p_ref))
+    cp_mol, enth_mol, entr_mol = np.broadcast_arrays(cp_mol, enth_mol, entr_mol)
+    return {"cp_mol": cp_mol,
+            "enth_mol": enth_mol,
+            "entr_mol": entr_mol,
+            "gibbs_mol": enth_mol - T*entr_mol}
@@ -15,11 +15,13 @@
 """
 Basic tests for H2 property package
 """
+import numpy as np
 import pytest
 
-from pyomo.environ import ConcreteModel, value, SolverFactory
+from pyomo.environ import ConcreteModel, value
 
-from h2_ideal_vap import configuration
+from dispatches.models.util.solvers import get_solver
+from h2_ideal_vap import configuration, evaluate_properties
 
 from idaes.core import FlowsheetBlock
 from idaes.generic_models.properties.core.generic.generic_property \
@@ -55,7 +57,7 @@ def test_h2_props():
     # Try another temeprature
     m.fs.state[0].temperature.fix(500)
 
-    solver = SolverFactory('ipopt')
+    solver = get_solver()
     solver.solve(m.fs)
 
     assert value(m.fs.state[0].cp_mol) == pytest.approx(29.26, rel=1e-2)
@@ -67,7 +69,7 @@ def test_h2_props():
     # Try another temeprature
     m.fs.state[0].temperature.fix(900)
 
-    solver = SolverFactory('ipopt')
+    solver = get_solver()
     solver.solve(m.fs)
 
     assert value(m.fs.state[0].cp_mol) == pytest.approx(29.88, rel=1e-2)
@@ -75,3 +77,21 @@ def test_h2_props():
     assert value(m.fs.state[0].entr_mol) == pytest.approx(163.1, rel=1e-2)
     assert (value(m.fs.state[0].gibbs_mol/m.fs.state[0].temperature) ==
             pytest.approx(-143.4, rel=1e-2))
+
+
+def test_evaluate_h2_props():
+    # Same NIST table values as above, evaluated in one vectorized call
+    T = np.array([300, 500, 900])
+    props = evaluate_properties(T, 101325)
+    assert props["cp_mol"] == pytest.approx([28.85, 29.26, 29.88], rel=1e-2)
+    assert props["enth_mol"] == pytest.approx([53.51, 5880, 17680], rel=1e-2)
+    assert props["entr_mol"] == pytest.approx([130.9, 145.7, 163.1], rel=1e-2)
+    assert props["gibbs_mol"] / T == pytest.approx(
+        [-130.7, -134.0, -143.4], rel=1e-2)
+
+    # Batch over a (T, P) grid; only entropy depends on pressure
+    grid = evaluate_properties(T[:, None], np.array([1e5, 1e6])[None, :])
+    assert grid["cp_mol"].shape == (3, 2)
+    assert grid["enth_mol"][:, 0] == pytest.approx(grid["enth_mol"][:, 1])
+    assert grid["entr_mol"][:, 0] - grid["entr_mol"][:, 1] == \
+        pytest.approx(np.full(3, 8.314462618 * np.log(10)))
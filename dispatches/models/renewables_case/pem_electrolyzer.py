@@ -1,5 +1,8 @@
+import numpy as np
+
 # Import Pyomo libraries
-from pyomo.environ import Reference, Var, Reals, Constraint, Set, units as pyunits
+from pyomo.environ import (Reference, Var, Reals, Constraint, Set, Param,
+                           SOSConstraint, units as pyunits)
 from pyomo.network import Port
 from pyomo.common.config import ConfigBlock, ConfigValue, In
 
@@ -13,8 +16,11 @@ from idaes.core import (Component,
                         UnitModelBlockData,
                         useDefault)
 from idaes.core.util.config import is_physical_parameter_block
+from idaes.core.util.exceptions import ConfigurationError
 import idaes.logger as idaeslog
 
+from dispatches.models.util.instrumentation import instrument
+
 _log = idaeslog.getLogger(__name__)
 
 
@@ -49,6 +55,48 @@ and used when constructing these,
 **default** - None.
 **Valid values:** {
 see property package for documentation.}"""))
+    config.declare("efficiency_mode", ConfigValue(
+        default="linear",
+        domain=In(["linear", "piecewise", "convex_hull"]),
+        description="Formulation of the efficiency curve",
+        doc="""How H2 production depends on the electricity input,
+**default** - "linear".
+**Valid values:** {
+**"linear"** - H2 flow = electricity * electricity_to_mol, with a
+electricity_to_mol variable per time point (nonlinear if both are free),
+**"piecewise"** - piecewise-linear interpolation of efficiency_curve, as an
+SOS2 formulation (MILP),
+**"convex_hull"** - H2 flow bounded above by every segment of
+efficiency_curve (LP). The H2 production curve must be concave, and the
+bound is only tight where H2 production is maximized.}"""))
+    config.declare("efficiency_curve", ConfigValue(
+        default=None,
+        domain=_efficiency_curve,
+        description="Tabulated load-vs-efficiency curve",
+        doc="""Required unless efficiency_mode is "linear",
+**default** - None.
+**Valid values:** {
+dict with lists "electricity" [kW], in increasing order, and
+"electricity_to_mol" [mol/kW/s] of the same length (at least 2 points).}"""))
+
+
+def _efficiency_curve(curve):
+    if curve is None:
+        return None
+    try:
+        electricity = np.asarray(curve["electricity"], dtype=np.float64)
+        efficiency = np.asarray(curve["electricity_to_mol"], dtype=np.float64)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("efficiency_curve must be a dict with lists "
+                         "'electricity' and 'electricity_to_mol'")
+    if electricity.ndim != 1 or electricity.shape != efficiency.shape or \
+            len(electricity) < 2:
+        raise ValueError("efficiency_curve needs at least 2 points, with as "
+                         "many electricity as electricity_to_mol values")
+    if (np.diff(electricity) <= 0).any():
+        raise ValueError("efficiency_curve electricity must be increasing")
+    return {"electricity": electricity.tolist(),
+            "electricity_to_mol": efficiency.tolist()}
 
 
 @declare_process_block_class("PEM_Electrolyzer", doc="Simple 0D proton-exchange membrane electrolyzer model.")
@@ -71,11 +119,18 @@ class PEMElectrolyzerData(UnitModelBlockData):
         # Call UnitModel.build to setup dynamics
         super(PEMElectrolyzerData, self).build()
 
-        self.electricity_to_mol = Var(self.flowsheet().config.time,
-                                      domain=Reals,
-                                      initialize=0.0,
-                                      doc="Efficiency",
-                                      units=pyunits.mol/pyunits.kW/pyunits.second)
+        mode = self.config.efficiency_mode
+        if mode != "linear" and self.config.efficiency_curve is None:
+            raise ConfigurationError(
+                "{} efficiency_mode {} requires an efficiency_curve".format(
+                    self.name, mode))
+
+        if mode == "linear":
+            self.electricity_to_mol = Var(self.flowsheet().config.time,
+                                          domain=Reals,
+                                          initialize=0.0,
+                                          doc="Efficiency",
+                                          units=pyunits.mol/pyunits.kW/pyunits.second)
 
         self.electricity = Var(self.flowsheet().config.time,
                                domain=Reals,
@@ -95,13 +150,156 @@ class PEMElectrolyzerData(UnitModelBlockData):
         self.outlet.temperature.fix(300)
         self.outlet.pressure.fix(101325)
 
-        @self.Constraint(self.flowsheet().config.time)
-        def efficiency_curve(b, t):
-            return pyunits.convert(b.outlet.flow_mol[t], to_units=pyunits.mol / pyunits.s) == b.electricity[t] * \
-                   b.electricity_to_mol[t]
+        if mode == "linear":
+            @self.Constraint(self.flowsheet().config.time)
+            def efficiency_curve(b, t):
+                return pyunits.convert(b.outlet.flow_mol[t], to_units=pyunits.mol / pyunits.s) == b.electricity[t] * \
+                       b.electricity_to_mol[t]
+        else:
+            self._build_tabulated_efficiency_curve()
+
+    def _build_tabulated_efficiency_curve(self):
+        """Build the efficiency curve from the efficiency_curve table.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        time_set = self.flowsheet().config.time
+        electricity, h2_flow = self._curve_points()
+
+        self.curve_points = Set(initialize=range(len(electricity)),
+                                ordered=True)
+        self.curve_electricity = Param(self.curve_points,
+                                       initialize=dict(enumerate(electricity)),
+                                       doc="Electricity at curve points",
+                                       units=pyunits.kW)
+        self.curve_h2_flow = Param(self.curve_points,
+                                   initialize=dict(enumerate(h2_flow)),
+                                   doc="H2 production at curve points",
+                                   units=pyunits.mol/pyunits.second)
+        for t in time_set:
+            self.electricity[t].setlb(electricity[0])
+            self.electricity[t].setub(electricity[-1])
+
+        if self.config.efficiency_mode == "piecewise":
+            self.curve_weight = Var(time_set, self.curve_points,
+                                    bounds=(0, 1),
+                                    initialize=0.0,
+                                    doc="Interpolation weights of curve points")
+
+            @self.Constraint(time_set)
+            def curve_weight_sum(b, t):
+                return sum(b.curve_weight[t, i] for i in b.curve_points) == 1
+
+            @self.Constraint(time_set)
+            def curve_electricity_eq(b, t):
+                return b.electricity[t] == sum(
+                    b.curve_weight[t, i] * b.curve_electricity[i]
+                    for i in b.curve_points)
+
+            @self.Constraint(time_set)
+            def efficiency_curve(b, t):
+                return pyunits.convert(b.outlet.flow_mol[t], to_units=pyunits.mol / pyunits.s) == sum(
+                    b.curve_weight[t, i] * b.curve_h2_flow[i]
+                    for i in b.curve_points)
+
+            # at most two adjacent weights are nonzero
+            self.curve_sos = SOSConstraint(
+                time_set,
+                rule=lambda b, t: [b.curve_weight[t, i] for i in b.curve_points],
+                sos=2)
+        else:
+            slopes = np.diff(h2_flow) / np.diff(electricity)
+            tol = 1e-10 * max(1.0, np.abs(slopes).max())
+            if (np.diff(slopes) > tol).any():
+                raise ConfigurationError(
+                    "{} efficiency_mode convex_hull requires a concave H2 "
+                    "production curve (electricity * electricity_to_mol)"
+                    .format(self.name))
+            self.curve_segments = Set(initialize=range(len(electricity) - 1),
+                                      ordered=True)
+
+            @self.Constraint(time_set, self.curve_segments)
+            def efficiency_curve(b, t, k):
+                slope = (b.curve_h2_flow[k + 1] - b.curve_h2_flow[k]) / \
+                    (b.curve_electricity[k + 1] - b.curve_electricity[k])
+                return pyunits.convert(b.outlet.flow_mol[t], to_units=pyunits.mol / pyunits.s) <= \
+                    b.curve_h2_flow[k] + slope * (b.electricity[t] - b.curve_electricity[k])
+
+    def _curve_points(self):
+        curve = self.config.efficiency_curve
+        electricity = np.array(curve["electricity"], dtype=np.float64)
+        h2_flow = electricity * np.array(curve["electricity_to_mol"],
+                                         dtype=np.float64)
+        return electricity, h2_flow
+
+    def _initialize_curve_weights(self, electricity, curve_electricity):
+        # weights of the two curve points around each electricity value
+        n = len(curve_electricity)
+        electricity = np.clip(np.nan_to_num(electricity),
+                              curve_electricity[0], curve_electricity[-1])
+        k = np.clip(np.searchsorted(curve_electricity, electricity) - 1, 0, n - 2)
+        upper = (electricity - curve_electricity[k]) / \
+            (curve_electricity[k + 1] - curve_electricity[k])
+        weights = np.zeros((len(electricity), n))
+        rows = np.arange(len(electricity))
+        weights[rows, k] = 1 - upper
+        weights[rows, k + 1] = upper
+        for t, row in zip(self.flowsheet().config.time, weights.tolist()):
+            for i, w in zip(self.curve_points, row):
+                self.curve_weight[t, i].value = w
 
     def _get_performance_contents(self, time_point=0):
+        if self.config.efficiency_mode != "linear":
+            return {"vars": {"Electricity": self.electricity[time_point]}}
         return {"vars": {"Efficiency": self.electricity_to_mol[time_point]}}
 
-    def initialize(self, **kwargs):
-        self.outlet_state.initialize(hold_state=False)
+    def initialize(self, outlvl=idaeslog.NOTSET, **kwargs):
+        """Initialize the outlet state from the efficiency curve.
+
+        The outlet flows for all time points are computed at once as
+        electricity * electricity_to_mol from the current (usually fixed)
+        values, or by interpolating the tabulated efficiency curve, before
+        the outlet state block is initialized.
+
+        Args:
+            outlvl: sets output level of initialization routine
+        Returns:
+            None
+        """
+        with instrument(self, "initialize"):
+            self._initialize(outlvl)
+
+    def _initialize(self, outlvl):
+        init_log = idaeslog.getInitLogger(self.name, outlvl, tag="unit")
+        time_set = self.flowsheet().config.time
+
+        electricity = np.array([v.value for v in self.electricity.values()],
+                               dtype=np.float64)
+        if self.config.efficiency_mode == "linear":
+            electricity_to_mol = np.array(
+                [v.value for v in self.electricity_to_mol.values()],
+                dtype=np.float64)
+            h2_flow = electricity * electricity_to_mol
+        else:
+            curve_electricity, curve_h2_flow = self._curve_points()
+            h2_flow = np.interp(electricity, curve_electricity, curve_h2_flow)
+            if self.config.efficiency_mode == "piecewise":
+                self._initialize_curve_weights(electricity, curve_electricity)
+        flow_units = pyunits.get_units(self.outlet.flow_mol[time_set.first()])
+        if flow_units is None:
+            scale = 1.0
+        else:
+            scale = pyunits.convert_value(
+                1.0, from_units=pyunits.mol / pyunits.s, to_units=flow_units)
+        flow_mol = np.nan_to_num(h2_flow) * scale
+        for t, flow in zip(time_set, flow_mol.tolist()):
+            var = self.outlet.flow_mol[t]
+            if not var.fixed:
+                var.value = flow
+        init_log.info_high("Outlet flows computed from efficiency curve.")
+
+        self.outlet_state.initialize(hold_state=False, outlvl=outlvl)
+        init_log.info("Initialization Complete.")
@@ -0,0 +1,116 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Multi-period (time-indexed) PEM electrolyzer flowsheet builder.
+
+All periods share one steady-state flowsheet whose time set is the list of
+periods, so the electrolyzer and its H2 state blocks are built once for the
+whole horizon instead of once per period.
+"""
+import time
+
+import numpy as np
+
+from pyomo.environ import ConcreteModel
+
+from idaes.core import FlowsheetBlock
+from idaes.generic_models.properties.core.generic.generic_property \
+    import GenericParameterBlock
+
+from dispatches.models.nuclear_case.h2_ideal_vap import configuration
+from dispatches.models.renewables_case.pem_electrolyzer import PEM_Electrolyzer
+from dispatches.models.util.solvers import get_solver
+from dispatches.models.util.timeseries import load_timeseries
+
+
+def build_pem_multiperiod(electricity, efficiency, efficiency_mode="linear"):
+    """
+    Build a flowsheet with a PEM electrolyzer over N periods.
+
+    Args:
+        electricity: electricity input [kW] for each period, array-like or
+                     pandas Series of length N, or a Profile (see
+                     dispatches.models.util.profiles) in any power units
+        efficiency: electricity_to_mol [mol/kW/s], either one value for all
+                    periods or an array-like of length N; or with another
+                    efficiency_mode, the efficiency_curve table of the
+                    electrolyzer
+        efficiency_mode: "linear", "piecewise" or "convex_hull", see
+                         PEM_Electrolyzer
+
+    Returns:
+        ConcreteModel with the electrolyzer at m.fs.unit and the H2 property
+        package at m.fs.properties, with electricity (and in linear mode
+        efficiency) fixed
+    """
+    n_periods = len(electricity)
+
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False,
+                                   "time_set": list(range(n_periods))})
+    m.fs.properties = GenericParameterBlock(default=configuration)
+    if efficiency_mode == "linear":
+        m.fs.unit = PEM_Electrolyzer(
+            default={"property_package": m.fs.properties})
+        load_timeseries(m.fs.unit, {"electricity": electricity,
+                                    "electricity_to_mol": efficiency})
+    else:
+        m.fs.unit = PEM_Electrolyzer(
+            default={"property_package": m.fs.properties,
+                     "efficiency_mode": efficiency_mode,
+                     "efficiency_curve": efficiency})
+        load_timeseries(m.fs.unit, {"electricity": electricity})
+    return m
+
+
+def benchmark(horizons=(24, 168, 720, 8760), solve=True, solver="ipopt"):
+    """
+    Time building, initializing and solving the multi-period electrolyzer
+    for each horizon length.
+
+    Args:
+        horizons: numbers of periods to time
+        solve: whether to initialize and solve, or only build
+        solver: solver used for the final solve
+
+    Returns:
+        list of dicts with keys periods, build, initialize and solve (in
+        seconds; initialize and solve are None if solve is False)
+    """
+    results = []
+    for n in horizons:
+        # one day of varying renewable output, repeated
+        electricity = 1 + 0.5 * np.sin(np.arange(n) * 2 * np.pi / 24)
+        t0 = time.perf_counter()
+        m = build_pem_multiperiod(electricity, 5)
+        row = {"periods": n, "build": time.perf_counter() - t0,
+               "initialize": None, "solve": None}
+        if solve:
+            t0 = time.perf_counter()
+            m.fs.unit.initialize()
+            row["initialize"] = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            get_solver(solver).solve(m)
+            row["solve"] = time.perf_counter() - t0
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    print("{:>8} {:>10} {:>12} {:>10}".format(
+        "periods", "build [s]", "init [s]", "solve [s]"))
+    for row in benchmark():
+        print("{periods:>8} {build:>10.3f} {initialize:>12.3f} "
+              "{solve:>10.3f}".format(**row))
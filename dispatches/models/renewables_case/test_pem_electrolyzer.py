@@ -1,9 +1,13 @@
+import pytest
+
 # Import objects from pyomo package
-from pyomo.environ import ConcreteModel, SolverFactory, Var, TerminationCondition, SolverStatus
+from pyomo.environ import (ConcreteModel, Var, TerminationCondition, SolverStatus,
+                           Objective, maximize)
 
 # Import the main FlowsheetBlock from IDAES. The flowsheet block will contain the unit model
 from idaes.core import FlowsheetBlock
 from idaes.core.util.testing import initialization_tester
+from idaes.core.util.exceptions import ConfigurationError
 
 # Import the H2 property package to create a properties block for the flowsheet
 from idaes.generic_models.properties.core.generic.generic_property \
@@ -11,6 +15,10 @@ from idaes.generic_models.properties.core.generic.generic_property \
 
 from dispatches.models.nuclear_case.h2_ideal_vap import configuration
 from dispatches.models.renewables_case.pem_electrolyzer import PEM_Electrolyzer
+from dispatches.models.renewables_case.pem_multiperiod import \
+    benchmark, build_pem_multiperiod
+from dispatches.models.util.results import extract_timeseries
+from dispatches.models.util.solvers import get_solver
 
 
 def test_pem():
@@ -34,7 +42,7 @@ def test_pem():
     m.fs.unit.electricity_to_mol.fix(5)
     initialization_tester(m)
 
-    solver = SolverFactory('ipopt')
+    solver = get_solver()
     results = solver.solve(m.fs)
 
     assert results.solver.termination_condition == TerminationCondition.optimal
@@ -44,3 +52,81 @@ def test_pem():
     assert m.fs.unit.outlet.flow_mol[0].value == 5.0
     assert m.fs.unit.outlet.temperature[0].value == 300
     assert m.fs.unit.outlet.pressure[0].value == 101325
+
+
+def test_pem_multiperiod():
+    electricity = [1, 2, 3, 4]
+    m = build_pem_multiperiod(electricity, [5, 5, 4, 4])
+
+    assert list(m.fs.config.time) == [0, 1, 2, 3]
+    assert all(m.fs.unit.electricity[t].fixed for t in m.fs.config.time)
+    assert m.fs.unit.electricity_to_mol[2].value == 4
+    initialization_tester(m)
+    # outlet flows are set directly from the efficiency curve
+    for t, flow in zip(m.fs.config.time, [5, 10, 12, 16]):
+        assert m.fs.unit.outlet.flow_mol[t].value == pytest.approx(flow)
+
+    solver = get_solver()
+    results = solver.solve(m.fs, options={"max_iter": 2})
+
+    assert results.solver.termination_condition == TerminationCondition.optimal
+    for t, flow in zip(m.fs.config.time, [5, 10, 12, 16]):
+        assert m.fs.unit.outlet.flow_mol[t].value == pytest.approx(flow)
+
+    columns = extract_timeseries(m.fs.unit)
+    assert list(columns["electricity"]) == electricity
+    assert list(columns["outlet_state.flow_mol"]) == pytest.approx(
+        [5, 10, 12, 16])
+
+
+def test_pem_multiperiod_benchmark():
+    results = benchmark(horizons=(2, 4), solve=False)
+    assert [r["periods"] for r in results] == [2, 4]
+    assert all(r["build"] > 0 and r["solve"] is None for r in results)
+
+
+# H2 production of 0, 250 and 400 mol/s: concave
+EFFICIENCY_CURVE = {"electricity": [0, 50, 100],
+                    "electricity_to_mol": [5, 5, 4]}
+
+
+def test_pem_piecewise():
+    m = build_pem_multiperiod([25, 75], EFFICIENCY_CURVE,
+                              efficiency_mode="piecewise")
+    assert not hasattr(m.fs.unit, "electricity_to_mol")
+    assert hasattr(m.fs.unit, "curve_sos")
+    assert m.fs.unit.electricity[0].ub == 100
+
+    m.fs.unit.initialize()
+    for t, flow in zip(m.fs.config.time, [125, 325]):
+        assert m.fs.unit.outlet.flow_mol[t].value == pytest.approx(flow)
+    assert [m.fs.unit.curve_weight[1, i].value for i in range(3)] == \
+        pytest.approx([0, 0.5, 0.5])
+
+
+def test_pem_convex_hull():
+    m = build_pem_multiperiod([25, 75], EFFICIENCY_CURVE,
+                              efficiency_mode="convex_hull")
+    assert len(m.fs.unit.efficiency_curve) == 4
+    m.fs.unit.initialize()
+    m.obj = Objective(expr=sum(m.fs.unit.outlet.flow_mol[t]
+                               for t in m.fs.config.time),
+                      sense=maximize)
+    results = get_solver().solve(m)
+    assert results.solver.termination_condition == TerminationCondition.optimal
+    for t, flow in zip(m.fs.config.time, [125, 325]):
+        assert m.fs.unit.outlet.flow_mol[t].value == pytest.approx(flow, rel=1e-6)
+
+
+def test_pem_efficiency_curve_errors():
+    with pytest.raises(ConfigurationError):
+        build_pem_multiperiod([25], None, efficiency_mode="piecewise")
+    # H2 production 0, 100, 400 mol/s is convex
+    with pytest.raises(ConfigurationError):
+        build_pem_multiperiod([25], {"electricity": [0, 50, 100],
+                                     "electricity_to_mol": [2, 2, 4]},
+                              efficiency_mode="convex_hull")
+    with pytest.raises(ValueError):
+        build_pem_multiperiod([25], {"electricity": [0, 0],
+                                     "electricity_to_mol": [5, 5]},
+                              efficiency_mode="piecewise")
@@ -0,0 +1,191 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Opt-in instrumentation of model initialize and solve phases.
+
+Nothing is recorded unless a :class:`Collector` is active::
+
+    with Collector("events.jsonl") as events:
+        m.fs.unit.initialize()
+        solver.solve(m)
+    print(events.summary())
+
+Model code marks a phase with :func:`instrument`. Each event is a dict with
+the block name, the phase, the wall time in seconds, the number of variables
+and active constraints in the block, and for solves the termination
+condition and (for ipopt, in-process or as an executable) the number of
+iterations.
+"""
+from contextlib import contextmanager
+import json
+import os
+import re
+import tempfile
+import time
+
+from pyomo.environ import Constraint, Var
+from pyomo.opt.solver import SystemCallSolver
+
+# Active collectors; events are sent to all of them
+_collectors = []
+
+_ITERATIONS_RE = re.compile(r"Number of Iterations\.*:\s*(\d+)")
+
+
+class Collector:
+    """
+    Collects instrumentation events in memory while active, and optionally
+    streams them to a JSON lines file.
+    """
+
+    def __init__(self, path=None):
+        self.events = []
+        self._path = path
+        self._file = None
+
+    def __enter__(self):
+        if self._path is not None:
+            self._file = open(self._path, "a", encoding="utf-8")
+        _collectors.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _collectors.remove(self)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, event):
+        self.events.append(event)
+        if self._file is not None:
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+
+    def summary(self):
+        """
+        Total wall time per block and phase, largest first.
+
+        Returns:
+            list of dicts with keys block, phase, count and wall_time
+        """
+        totals = {}
+        for e in self.events:
+            key = (e["block"], e["phase"])
+            count, wall_time = totals.get(key, (0, 0.0))
+            totals[key] = (count + 1, wall_time + e["wall_time"])
+        rows = [{"block": b, "phase": p, "count": c, "wall_time": w}
+                for (b, p), (c, w) in totals.items()]
+        rows.sort(key=lambda r: r["wall_time"], reverse=True)
+        return rows
+
+
+def enabled():
+    """Whether any collector is active."""
+    return bool(_collectors)
+
+
+class _Event:
+    def __init__(self, block, phase):
+        if isinstance(block, (list, tuple)):
+            # block datas, e.g. a chunk of an indexed block
+            name = block[0].parent_component().name if block else ""
+        else:
+            name = block.name
+        self.data = {"block": name,
+                     "phase": phase,
+                     "start": time.time(),
+                     "n_variables": _count(block, Var, active=None),
+                     "n_constraints": _count(block, Constraint, active=True)}
+        self._log_path = None
+        self._iterations = None
+
+    def solve_kwargs(self, solver):
+        """Extra keyword arguments for solver.solve, to capture its log or
+        iteration count."""
+        # a SolverSession passes these on to its backend
+        backend = getattr(solver, "backend", solver)
+        if isinstance(backend, SystemCallSolver):
+            fd, self._log_path = tempfile.mkstemp(suffix=".log")
+            os.close(fd)
+            return {"logfile": self._log_path}
+        config = getattr(backend, "config", None)
+        if config is not None and "intermediate_callback" in config:
+            # in-process ipopt (cyipopt) calls this after every iteration
+            return {"intermediate_callback": self._intermediate}
+        return {}
+
+    def _intermediate(self, nlp, alg_mod, iter_count, *args):
+        self._iterations = iter_count
+        return True
+
+    def record_results(self, results):
+        """Add the termination condition and iteration count of a solve."""
+        self.data["termination"] = str(
+            results.solver.termination_condition)
+        if self._iterations is not None:
+            self.data["iterations"] = self._iterations
+        if self._log_path is not None:
+            with open(self._log_path, "r", errors="replace") as f:
+                match = _ITERATIONS_RE.search(f.read())
+            os.remove(self._log_path)
+            self._log_path = None
+            if match:
+                self.data["iterations"] = int(match.group(1))
+
+
+class _NullEvent:
+    def solve_kwargs(self, solver):
+        return {}
+
+    def record_results(self, results):
+        pass
+
+
+_NULL_EVENT = _NullEvent()
+
+
+@contextmanager
+def instrument(block, phase):
+    """
+    Time a phase (e.g. "initialize" or "solve") of a block and send the event
+    to the active collectors. If no collector is active this does nothing.
+    The block may also be a list of block datas, which is reported under the
+    name of their indexed block.
+
+    Yields:
+        event object; for solves, pass event.solve_kwargs(solver) to
+        solver.solve and then call event.record_results(results)
+    """
+    if not _collectors:
+        yield _NULL_EVENT
+        return
+    event = _Event(block, phase)
+    t0 = time.perf_counter()
+    try:
+        yield event
+    finally:
+        event.data["wall_time"] = time.perf_counter() - t0
+        for collector in list(_collectors):
+            collector.record(event.data)
+
+
+def _count(block, ctype, active):
+    if isinstance(block, (list, tuple)):
+        datas = block
+    else:
+        datas = block.values() if block.is_indexed() else [block]
+    return sum(1 for b in datas
+               for _ in b.component_data_objects(ctype, active=active,
+                                                 descend_into=True))
@@ -0,0 +1,238 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Compact store of hourly operating profiles (electricity, prices, efficiencies)
+with Pyomo units.
+
+Each profile is one read-only float64 array plus its units, so a year of
+hourly data for a unit is a single 70 kB array rather than thousands of
+Pyomo objects. Profiles only become Pyomo data when they are loaded into a
+model, just before it is solved, and are converted to the units of the
+variables they are loaded into::
+
+    store = ProfileStore()
+    store.add("wind_power", wind, units=pyunits.MW)
+    store.add("lmp", prices, units=pyunits.USD_2018/pyunits.MWh)
+    ...
+    store.apply(m.fs.unit, {"electricity": "wind_power"})   # MW -> kW
+
+A store saved with :meth:`ProfileStore.save` is loaded memory-mapped, so the
+processes on a node share one copy of it.
+"""
+import json
+import os
+
+import numpy as np
+
+from pyomo.environ import units as pyunits
+
+from dispatches.models.util.timeseries import load_timeseries
+
+INDEX_NAME = "profiles.json"
+
+
+class Profile:
+    """
+    Read-only array of values with Pyomo units.
+
+    Args:
+        values: array-like of values
+        units: Pyomo units of the values, or None if they have none
+        name: name of the profile
+    """
+    __slots__ = ("name", "values", "units")
+
+    def __init__(self, values, units=None, name=None):
+        # asanyarray keeps memory-mapped arrays memory-mapped
+        values = np.asanyarray(values, dtype=np.float64)
+        if values.flags.writeable:
+            values = values.copy()
+            values.flags.writeable = False
+        self.name = name
+        self.values = values
+        self.units = units
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __array__(self, dtype=None, copy=None):
+        # the stored array is shared and read-only; only hand it out when
+        # no copy is asked for
+        if copy:
+            return self.values.astype(dtype or np.float64, copy=True)
+        if dtype is None or np.dtype(dtype) == self.values.dtype:
+            return self.values
+        if copy is False:
+            raise ValueError("Converting %s to %s requires a copy" %
+                             (self, np.dtype(dtype)))
+        return self.values.astype(dtype)
+
+    def __repr__(self):
+        return "Profile(%s, %d values, %s)" % (self.name, len(self.values),
+                                               self.units)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def values_in(self, units):
+        """
+        Values converted to the given units. Returns the stored array itself
+        if no conversion is needed.
+        """
+        if units is None or self.units is None or units is self.units:
+            return self.values
+        factor = pyunits.convert_value(1.0, from_units=self.units,
+                                       to_units=units)
+        if factor == 1.0:
+            return self.values
+        return self.values * factor
+
+    def to(self, units):
+        """This profile converted to other units."""
+        return Profile(self.values_in(units), units, self.name)
+
+    def window(self, start, stop):
+        """Profile of the periods start to stop, sharing this one's array."""
+        return Profile(self.values[start:stop], self.units, self.name)
+
+
+class ProfileStore:
+    """
+    Named profiles of the same length.
+
+    Args:
+        profiles: optional dict of name to Profile
+    """
+    __slots__ = ("_profiles",)
+
+    def __init__(self, profiles=None):
+        self._profiles = {}
+        for name, profile in (profiles or {}).items():
+            self.add(name, profile.values, profile.units)
+
+    def add(self, name, values, units=None):
+        """
+        Add or replace a profile.
+
+        Returns:
+            the Profile
+        """
+        profile = Profile(values, units, name)
+        if self._profiles and len(profile) != len(self):
+            raise ValueError("Profile %s has %d values, expected %d" %
+                             (name, len(profile), len(self)))
+        self._profiles[name] = profile
+        return profile
+
+    def __getitem__(self, name):
+        return self._profiles[name]
+
+    def __contains__(self, name):
+        return name in self._profiles
+
+    def __iter__(self):
+        return iter(self._profiles)
+
+    def __len__(self):
+        """Number of periods."""
+        for profile in self._profiles.values():
+            return len(profile)
+        return 0
+
+    @property
+    def names(self):
+        return list(self._profiles)
+
+    @property
+    def nbytes(self):
+        return sum(p.nbytes for p in self._profiles.values())
+
+    def window(self, start, stop):
+        """Store with the periods start to stop of every profile, without
+        copying the data."""
+        return ProfileStore({name: p.window(start, stop)
+                             for name, p in self._profiles.items()})
+
+    def apply(self, block, mapping, fix=True):
+        """
+        Load profiles into the time-indexed components of a block, in the
+        units of each component.
+
+        Args:
+            block: block the component names are relative to
+            mapping: dict of component name (e.g. "electricity") to profile
+                     name
+            fix: True to fix the variables, False to only set their values
+
+        Returns:
+            None
+        """
+        load_timeseries(block, {component: self[name]
+                                for component, name in mapping.items()},
+                        fix=fix)
+
+    def save(self, directory):
+        """
+        Save the store as one .npy file per profile plus an index, for
+        memory-mapped loading with ProfileStore.load.
+        """
+        os.makedirs(directory, exist_ok=True)
+        index = {}
+        for i, (name, profile) in enumerate(self._profiles.items()):
+            filename = "%04d.npy" % i
+            np.save(os.path.join(directory, filename), profile.values)
+            index[name] = {"file": filename,
+                           "units": None if profile.units is None
+                           else str(profile.units)}
+        with open(os.path.join(directory, INDEX_NAME), "w") as f:
+            json.dump(index, f, indent=1)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """
+        Load a store saved with save. The arrays are memory-mapped read-only
+        unless mmap_mode is None.
+        """
+        with open(os.path.join(directory, INDEX_NAME), "r") as f:
+            index = json.load(f)
+        store = cls()
+        for name, entry in index.items():
+            values = np.load(os.path.join(directory, entry["file"]),
+                             mmap_mode=mmap_mode)
+            units = entry["units"]
+            store._profiles[name] = Profile(
+                values, None if units is None else parse_units(units), name)
+        return store
+
+
+def parse_units(text):
+    """
+    Pyomo units from their string form, e.g. "mol/kW/s", as written by save.
+    The string is parsed by the pint registry of the Pyomo units, never
+    evaluated as Python.
+    """
+    # imported here so that pint is only needed for profiles with units
+    from pyomo.core.base.units_container import _PyomoUnit
+
+    registry = pyunits._pint_registry
+    try:
+        pint_units = registry.parse_units(text)
+    except Exception as err:  # pint raises several error types
+        raise ValueError("Cannot parse units %r: %s" % (text, err))
+    return _PyomoUnit(pint_units, registry)
@@ -0,0 +1,155 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Columnar extraction of time-indexed results from a solved flowsheet.
+
+All time-indexed variables below a block are read in one pass over the
+model and returned as one NumPy array per variable, in time order::
+
+    columns = extract_timeseries(m.fs.unit)
+    columns["electricity"], columns["outlet_state.flow_mol"]
+
+Variables indexed by time and other sets get one column per other index,
+e.g. ``"outlet_state.mole_frac_comp[hydrogen]"``. Variables of blocks
+indexed by time, such as state blocks, are named after the indexed block.
+The results can also be returned as a pandas DataFrame (requires pandas)
+or written to a Parquet file (requires pyarrow).
+"""
+import numpy as np
+
+from pyomo.environ import Var
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def _time_set(block, time):
+    if time is not None:
+        return time
+    if not hasattr(block, "flowsheet"):
+        raise ValueError("time must be given for %s, which is not part of "
+                         "a flowsheet" % block.name)
+    return block.flowsheet().config.time
+
+
+def _index_name(index):
+    if not isinstance(index, tuple):
+        index = (index,)
+    return "[%s]" % ",".join(str(i) for i in index)
+
+
+def _time_position(component, time):
+    # position of the time set among the indexing sets of component, or None
+    if not component.is_indexed():
+        return None
+    for pos, s in enumerate(component.index_set().subsets()):
+        if s is time:
+            return pos
+    return None
+
+
+def extract_timeseries(block, time=None, include_fixed=True):
+    """
+    Values of all time-indexed variables below a block.
+
+    Args:
+        block: unit model, flowsheet or any other block
+        time: time set (default: the time set of the flowsheet of block)
+        include_fixed: whether to include fixed variables (e.g. inputs)
+
+    Returns:
+        dict of column name (relative to block) to 1-D float array with
+        one value per time point; None values become NaN
+    """
+    time = _time_set(block, time)
+    position = {t: i for i, t in enumerate(time)}
+    n = len(position)
+    columns = {}
+
+    def column(name):
+        values = columns.get(name, None)
+        if values is None:
+            values = columns[name] = np.full(n, np.nan)
+        return values
+
+    for var in block.component_objects(Var, descend_into=True):
+        pos = _time_position(var, time)
+        if pos is not None:
+            name = var.getname(fully_qualified=True, relative_to=block)
+            for index, data in var.items():
+                if not include_fixed and data.fixed:
+                    continue
+                if var.dim() == 1:
+                    key, rest = index, ()
+                else:
+                    key, rest = index[pos], index[:pos] + index[pos + 1:]
+                col = name + _index_name(rest) if rest else name
+                column(col)[position[key]] = np.nan if data.value is None \
+                    else data.value
+            continue
+        # a variable of one element of a block indexed by time
+        parent = var.parent_block()
+        owner = parent.parent_component()
+        if owner is block or _time_position(owner, time) is None \
+                or owner.dim() != 1:
+            continue
+        t = parent.index()
+        name = "%s.%s" % (owner.getname(fully_qualified=True,
+                                        relative_to=block), var.local_name)
+        for index, data in var.items():
+            if not include_fixed and data.fixed:
+                continue
+            col = name + _index_name(index) if index is not None else name
+            column(col)[position[t]] = np.nan if data.value is None \
+                else data.value
+    return columns
+
+
+def to_dataframe(block, time=None, include_fixed=True):
+    """
+    Time-indexed results as a pandas DataFrame indexed by time; see
+    extract_timeseries for the arguments.
+    """
+    if pandas is None:
+        raise ImportError("pandas is required to create a DataFrame")
+    time = _time_set(block, time)
+    columns = extract_timeseries(block, time, include_fixed)
+    return pandas.DataFrame(columns, index=pandas.Index(list(time),
+                                                        name="time"))
+
+
+def write_parquet(block, path, time=None, include_fixed=True):
+    """
+    Write time-indexed results to a Parquet file, with one row per time
+    point and a "time" column; see extract_timeseries for the arguments.
+
+    Returns:
+        number of rows written
+    """
+    if pyarrow is None:
+        raise ImportError("pyarrow is required to write Parquet files")
+    time = _time_set(block, time)
+    columns = {"time": np.array(list(time))}
+    columns.update(extract_timeseries(block, time, include_fixed))
+    pyarrow.parquet.write_table(pyarrow.table(columns), str(path))
+    return len(columns["time"])
@@ -0,0 +1,214 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Opt-in memoization of solves with identical fixed inputs.
+
+Nothing is cached unless a :class:`SolutionCache` is active::
+
+    with SolutionCache(path="solutions") as cache:
+        for point in points:
+            ...
+            m.fs.unit.initialize()
+    print(cache.hits, cache.misses)
+
+Model code marks a cacheable solve with :func:`cached_solve`. The key of a
+solve is a hash of the structure of the block (its variables, which of them
+are fixed, and its active constraints) and of the values of its fixed
+variables and mutable parameters. On a hit the values of the free variables
+are restored from the cache and the solver is not called. Only optimal
+solutions are cached. The most recently used entries are kept in memory;
+with a path, all entries are also saved to disk and shared between runs.
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from pyomo.environ import Constraint, Param, TerminationCondition, Var
+from pyomo.opt import SolverResults, SolverStatus
+
+# Active caches; the innermost one is used
+_caches = []
+
+
+class SolutionCache:
+    """
+    LRU cache of optimal solutions, keyed by model structure and fixed
+    input values.
+
+    Args:
+        max_entries: number of solutions kept in memory
+        path: directory to save solutions to, or None to keep them in
+              memory only
+        hash_expressions: include the constraint expressions in the
+                          structure key. Turning this off is faster, but
+                          then blocks whose constraints differ only in
+                          immutable parameters share entries.
+    """
+
+    def __init__(self, max_entries=1024, path=None, hash_expressions=True):
+        self.max_entries = max_entries
+        self.hash_expressions = hash_expressions
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._path = path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        _caches.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _caches.remove(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, block):
+        """Cache key of the current state of block."""
+        datas = _block_datas(block)
+        structure = hashlib.sha256()
+        fixed = []
+        for b in datas:
+            for v in b.component_data_objects(Var, descend_into=True):
+                structure.update(v.name.encode())
+                if v.fixed:
+                    structure.update(b"=")
+                    fixed.append(v.value)
+            for p in b.component_data_objects(Param, descend_into=True):
+                if p.parent_component().mutable:
+                    structure.update(p.name.encode())
+                    fixed.append(p.value)
+            for c in b.component_data_objects(Constraint, active=True,
+                                              descend_into=True):
+                structure.update(c.name.encode())
+                if self.hash_expressions:
+                    structure.update(str(c.expr).encode())
+        values = np.array(fixed, dtype=np.float64)
+        return structure.hexdigest()[:32] + \
+            hashlib.sha256(values.tobytes()).hexdigest()[:32]
+
+    def get(self, key, block):
+        """
+        Restore the solution saved under key into block.
+
+        Returns:
+            True on a hit, False on a miss
+        """
+        values = self._entries.get(key, None)
+        if values is None and self._path is not None:
+            try:
+                with open(self._entry_path(key), "r") as f:
+                    values = json.load(f)
+            except (OSError, ValueError):
+                values = None
+        if values is None:
+            self.misses += 1
+            return False
+        self._remember(key, values)
+        free = _free_vars(block)
+        if len(free) != len(values):
+            # hash collision or a corrupt file; treat as a miss
+            self.misses += 1
+            return False
+        for v, val in zip(free, values):
+            v.value = val
+        self.hits += 1
+        return True
+
+    def put(self, key, block):
+        """Save the values of the free variables of block under key."""
+        values = [v.value for v in _free_vars(block)]
+        self._remember(key, values)
+        if self._path is not None:
+            tmp_path = self._entry_path(key) + ".tmp-%d" % os.getpid()
+            with open(tmp_path, "w") as f:
+                json.dump(values, f)
+            os.replace(tmp_path, self._entry_path(key))
+
+    def clear(self):
+        """Remove all entries, in memory and on disk."""
+        self._entries.clear()
+        if self._path is not None:
+            for name in os.listdir(self._path):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self._path, name))
+
+    def _remember(self, key, values):
+        self._entries[key] = values
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _entry_path(self, key):
+        return os.path.join(self._path, key + ".json")
+
+
+def active_cache():
+    """The innermost active cache, or None."""
+    return _caches[-1] if _caches else None
+
+
+def _block_datas(block):
+    if isinstance(block, (list, tuple)):
+        return block
+    return block.values() if block.is_indexed() else [block]
+
+
+def _free_vars(block):
+    return [v for b in _block_datas(block)
+            for v in b.component_data_objects(Var, descend_into=True)
+            if not v.fixed]
+
+
+def _cached_results():
+    results = SolverResults()
+    results.solver.status = SolverStatus.ok
+    results.solver.termination_condition = TerminationCondition.optimal
+    results.solver.message = "Solution restored from cache"
+    return results
+
+
+def cached_solve(block, solve_fn, cache=None):
+    """
+    Solve block with solve_fn, unless the active cache (or cache) holds the
+    solution for its current fixed inputs.
+
+    Args:
+        block: block, indexed block or list of block datas that solve_fn
+               solves
+        solve_fn: function without arguments that solves block and returns
+                  the solver results
+        cache: SolutionCache to use instead of the active one
+
+    Returns:
+        results of solve_fn, or on a cache hit a SolverResults object with
+        an optimal termination condition
+    """
+    if cache is None:
+        cache = active_cache()
+    if cache is None:
+        return solve_fn()
+    key = cache.key(block)
+    if cache.get(key, block):
+        return _cached_results()
+    results = solve_fn()
+    if results.solver.termination_condition == TerminationCondition.optimal:
+        cache.put(key, block)
+    return results
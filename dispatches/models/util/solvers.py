@@ -0,0 +1,143 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Solver sessions that are reused across solves.
+
+``SolverFactory("ipopt")`` writes an .nl file, starts an ipopt process and
+reads back a .sol file for every solve. For many small solves that overhead
+dominates. :func:`get_solver` returns a session on the first available of:
+
+    cyipopt  ipopt called in-process through pynumero (no process launch)
+    ipopt    the ipopt executable through SolverFactory
+
+Both report non-optimal results through the results object rather than by
+raising. The square models solved throughout DISPATCHES have no objective;
+pynumero requires one, so a session gives such a model a constant objective
+for the duration of an in-process solve.
+
+The underlying solver object is created once per process and shared by all
+sessions, which only differ in their options::
+
+    solver = get_solver(options={"tol": 1e-8})
+    results = solver.solve(m, tee=False)
+
+Set the environment variable DISPATCHES_IPOPT_BACKENDS to a comma-separated
+list (e.g. "ipopt") to change the order or restrict the choice.
+"""
+import logging
+import os
+
+from pyomo.common.modeling import unique_component_name
+from pyomo.environ import Objective, SolverFactory
+from pyomo.opt.solver import SystemCallSolver
+
+_log = logging.getLogger(__name__)
+
+IPOPT_BACKENDS = ("cyipopt", "ipopt")
+
+# Solver name -> solver object, shared by all sessions in this process
+_backends = {}
+
+
+def _ipopt_backends():
+    names = os.environ.get("DISPATCHES_IPOPT_BACKENDS", None)
+    if names:
+        return tuple(n.strip() for n in names.split(",") if n.strip())
+    return IPOPT_BACKENDS
+
+
+def _backend(name):
+    solver = _backends.get(name, None)
+    if solver is not None:
+        return solver
+    if name == "ipopt":
+        candidates = _ipopt_backends()
+        for candidate in candidates:
+            try:
+                solver = SolverFactory(candidate)
+                if solver.available(exception_flag=False):
+                    break
+            except Exception as err:  # e.g. a broken optional dependency
+                _log.debug(f"Solver {candidate} is not usable: {err}")
+            solver = None
+        if solver is None:
+            # let the last choice report itself as unavailable when used
+            solver = SolverFactory(candidates[-1])
+        _log.info(f"Using {type(solver).__name__} for ipopt solves")
+    else:
+        solver = SolverFactory(name)
+    _backends[name] = solver
+    return solver
+
+
+class SolverSession:
+    """
+    Solver with its own options, on top of a solver object shared by the
+    process. Use like a Pyomo solver; only solve() is supported.
+
+    Args:
+        name: solver name; "ipopt" chooses the first available backend in
+              IPOPT_BACKENDS, any other name is passed to SolverFactory
+        options: solver options used for every solve of this session
+    """
+
+    def __init__(self, name="ipopt", options=None):
+        self.name = name
+        self.backend = _backend(name)
+        self.options = dict(options or {})
+
+    def available(self, exception_flag=False):
+        return self.backend.available(exception_flag=exception_flag)
+
+    def solve(self, model, tee=False, options=None, **kwargs):
+        """
+        Solve model; options are added to the session options for this
+        solve only. Other keyword arguments are passed to the backend.
+        """
+        solve_options = dict(self.options)
+        if options:
+            solve_options.update(options)
+        if isinstance(self.backend, SystemCallSolver) or \
+                next(model.component_data_objects(Objective, active=True),
+                     None) is not None:
+            return self.backend.solve(model, tee=tee, options=solve_options,
+                                      **kwargs)
+        # in-process backends need an objective; a constant one leaves the
+        # solution of a square model unchanged
+        name = unique_component_name(model, "_session_objective")
+        model.add_component(name, Objective(expr=0))
+        try:
+            return self.backend.solve(model, tee=tee, options=solve_options,
+                                      **kwargs)
+        finally:
+            model.del_component(name)
+
+    def __repr__(self):
+        return "SolverSession(%s, %s)" % (self.name,
+                                          type(self.backend).__name__)
+
+
+def get_solver(name="ipopt", options=None):
+    """
+    Solver session for name, reusing the solver object of earlier sessions.
+
+    Args:
+        name: solver name, see SolverSession
+        options: dict of solver options
+
+    Returns:
+        SolverSession
+    """
+    return SolverSession(name, options)
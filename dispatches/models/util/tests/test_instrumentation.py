@@ -0,0 +1,114 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.models.util.instrumentation
+"""
+import json
+from types import SimpleNamespace
+
+from pyomo.environ import (Block, ConcreteModel, Constraint, SolverFactory,
+                           TerminationCondition, Var)
+
+from dispatches.models.util.instrumentation import (Collector, enabled,
+                                                    instrument)
+
+
+def make_model():
+    m = ConcreteModel()
+    m.b = Block([1, 2])
+    for b in m.b.values():
+        b.x = Var(initialize=1)
+        b.y = Var(initialize=2)
+        b.c = Constraint(expr=b.x == b.y)
+    return m
+
+
+def test_disabled():
+    m = make_model()
+    assert not enabled()
+    with instrument(m.b, "initialize") as event:
+        assert event.solve_kwargs(SolverFactory("ipopt")) == {}
+
+
+def test_collector(tmp_path):
+    m = make_model()
+    path = tmp_path / "events.jsonl"
+    with Collector(path) as events:
+        assert enabled()
+        with instrument(m.b, "initialize"):
+            with instrument(m.b[1], "solve"):
+                pass
+    assert not enabled()
+
+    assert [e["phase"] for e in events.events] == ["solve", "initialize"]
+    init = events.events[1]
+    assert init["block"] == "b"
+    assert init["n_variables"] == 4
+    assert init["n_constraints"] == 2
+    assert events.events[0]["n_variables"] == 2
+    assert init["wall_time"] >= events.events[0]["wall_time"]
+
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == events.events
+
+    summary = events.summary()
+    assert summary[0]["phase"] == "initialize"
+    assert summary[0]["count"] == 1
+
+
+def test_block_datas():
+    m = make_model()
+    with Collector() as events:
+        # a chunk of an indexed block only counts its own components
+        with instrument([m.b[2]], "solve"):
+            pass
+    assert events.events[0]["block"] == "b"
+    assert events.events[0]["n_variables"] == 2
+    assert events.events[0]["n_constraints"] == 1
+
+
+def test_solve_iterations():
+    m = make_model()
+    with Collector() as events:
+        with instrument(m.b[1], "solve") as event:
+            kwargs = event.solve_kwargs(SolverFactory("ipopt"))
+            # stand-in for the log ipopt writes during solve
+            with open(kwargs["logfile"], "w") as f:
+                f.write("Number of Iterations....: 7\n")
+            results = SimpleNamespace(solver=SimpleNamespace(
+                termination_condition=TerminationCondition.optimal))
+            event.record_results(results)
+    assert events.events[0]["iterations"] == 7
+    assert events.events[0]["termination"] == "optimal"
+
+
+def test_solve_iterations_in_process():
+    class InProcessSolver:
+        # stand-in for cyipopt, which reports each iteration to a callback
+        config = {"intermediate_callback": None}
+
+        def solve(self, model, intermediate_callback=None):
+            for i in range(4):
+                assert intermediate_callback(None, 0, i, 0.0, 0.0, 0.0, 0.0,
+                                             0.0, 0.0, 0.0, 0.0, 0)
+            return SimpleNamespace(solver=SimpleNamespace(
+                termination_condition=TerminationCondition.optimal))
+
+    m = make_model()
+    solver = InProcessSolver()
+    with Collector() as events:
+        with instrument(m.b[1], "solve") as event:
+            event.record_results(solver.solve(m, **event.solve_kwargs(solver)))
+    assert events.events[0]["iterations"] == 3
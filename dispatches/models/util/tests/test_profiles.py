@@ -0,0 +1,102 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.models.util.profiles
+"""
+import numpy as np
+import pytest
+
+from pyomo.environ import ConcreteModel, Set, Var, value
+
+from dispatches.models.util.profiles import Profile, ProfileStore, parse_units
+
+
+def test_profile_is_compact_and_read_only():
+    profile = Profile(np.arange(8760), name="load")
+    assert not hasattr(profile, "__dict__")
+    assert profile.nbytes == 8760 * 8
+    assert profile[3] == 3.0
+    with pytest.raises(ValueError):
+        profile.values[0] = 1
+    window = profile.window(24, 48)
+    assert np.shares_memory(window.values, profile.values)
+    assert np.asarray(window).tolist() == list(range(24, 48))
+
+
+def test_array_copy():
+    profile = Profile([1.0, 2.0, 3.0])
+    # asarray shares the read-only values, array gives a fresh copy
+    assert np.asarray(profile) is profile.values
+    copied = np.array(profile)
+    assert copied is not profile.values
+    copied[0] = 5.0
+    assert profile[0] == 1.0
+    assert np.array(profile, dtype=np.float32).dtype == np.float32
+    assert np.asarray(profile, dtype=np.float32).tolist() == [1, 2, 3]
+    with pytest.raises(ValueError):
+        np.asarray(profile, dtype=np.float32, copy=False)
+
+
+def test_store(tmp_path):
+    store = ProfileStore()
+    store.add("electricity", np.linspace(1, 2, 24))
+    store.add("efficiency", np.full(24, 5.0))
+    assert len(store) == 24
+    assert store.names == ["electricity", "efficiency"]
+    with pytest.raises(ValueError):
+        store.add("short", [1, 2])
+
+    store.save(tmp_path)
+    loaded = ProfileStore.load(tmp_path)
+    assert isinstance(loaded["electricity"].values, np.memmap)
+    assert loaded["efficiency"].values.tolist() == [5.0] * 24
+    assert "electricity" in loaded and "price" not in loaded
+
+    m = ConcreteModel()
+    m.time = Set(initialize=range(4), ordered=True)
+    m.electricity = Var(m.time)
+    m.electricity_to_mol = Var(m.time)
+    loaded.window(0, 4).apply(m, {"electricity": "electricity",
+                                  "electricity_to_mol": "efficiency"})
+    assert m.electricity[3].fixed
+    assert value(m.electricity[3]) == pytest.approx(1 + 3 / 23)
+    assert value(m.electricity_to_mol[0]) == 5.0
+
+
+def test_units(tmp_path):
+    pytest.importorskip("pint")
+    from pyomo.environ import units as pyunits
+
+    store = ProfileStore()
+    store.add("wind", [1.0, 2.0], units=pyunits.MW)
+    assert store["wind"].values_in(pyunits.kW).tolist() == [1000, 2000]
+    store.save(tmp_path)
+    loaded = ProfileStore.load(tmp_path)
+
+    m = ConcreteModel()
+    m.time = Set(initialize=range(2), ordered=True)
+    m.electricity = Var(m.time, units=pyunits.kW)
+    loaded.apply(m, {"electricity": "wind"})
+    assert value(m.electricity[1]) == pytest.approx(2000)
+
+    units = parse_units(str(pyunits.mol / pyunits.kW / pyunits.s))
+    assert pyunits.convert_value(1, from_units=units,
+                                 to_units=pyunits.mol / pyunits.MJ) == \
+        pytest.approx(1000)
+    # the units string is not evaluated as Python
+    with pytest.raises(ValueError):
+        parse_units("mol.__class__.__mro__")
+    with pytest.raises(ValueError):
+        parse_units("__import__('os')")
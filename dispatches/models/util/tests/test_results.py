@@ -0,0 +1,72 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.models.util.results
+"""
+import numpy as np
+import pytest
+
+from pyomo.environ import Block, ConcreteModel, Set, Var
+
+from dispatches.models.util.results import (extract_timeseries,
+                                            to_dataframe,
+                                            write_parquet)
+
+
+def make_model(n=4):
+    m = ConcreteModel()
+    m.time = Set(initialize=range(n), ordered=True)
+    m.comps = Set(initialize=["h2", "h2o"], ordered=True)
+    m.unit = Block()
+    m.unit.area = Var(initialize=10)
+    m.unit.duty = Var(m.time, initialize=lambda b, t: 2.0 * t)
+    m.unit.frac = Var(m.comps, m.time, initialize=0.5)
+    m.unit.state = Block(m.time)
+    for t, b in m.unit.state.items():
+        b.temperature = Var(initialize=300 + t)
+        b.flow = Var(m.comps, initialize=t)
+    m.unit.duty[0].fix()
+    m.unit.frac["h2", 1].value = None
+    return m
+
+
+def test_extract_timeseries():
+    m = make_model()
+    columns = extract_timeseries(m.unit, time=m.time)
+    assert sorted(columns) == ["duty", "frac[h2]", "frac[h2o]",
+                               "state.flow[h2]", "state.flow[h2o]",
+                               "state.temperature"]
+    np.testing.assert_array_equal(columns["duty"], [0, 2, 4, 6])
+    np.testing.assert_array_equal(columns["state.temperature"],
+                                  [300, 301, 302, 303])
+    assert np.isnan(columns["frac[h2]"][1])
+
+    columns = extract_timeseries(m.unit, time=m.time, include_fixed=False)
+    assert np.isnan(columns["duty"][0])
+    with pytest.raises(ValueError):
+        extract_timeseries(m.unit)
+
+
+def test_dataframe_and_parquet(tmp_path):
+    pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    m = make_model()
+    df = to_dataframe(m.unit, time=m.time)
+    assert df.loc[2, "state.temperature"] == 302
+    path = tmp_path / "results.parquet"
+    assert write_parquet(m.unit, path, time=m.time) == 4
+    import pyarrow.parquet
+    table = pyarrow.parquet.read_table(path)
+    assert table.column("duty").to_pylist() == [0, 2, 4, 6]
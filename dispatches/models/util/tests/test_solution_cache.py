@@ -0,0 +1,101 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.models.util.solution_cache
+"""
+from pyomo.environ import (ConcreteModel, Constraint, Param,
+                           TerminationCondition, Var)
+from pyomo.opt import SolverResults
+
+from dispatches.models.util.solution_cache import (SolutionCache,
+                                                   active_cache,
+                                                   cached_solve)
+
+
+def make_model():
+    m = ConcreteModel()
+    m.x = Var(initialize=1)
+    m.y = Var(initialize=0)
+    m.k = Param(initialize=2, mutable=True)
+    m.c = Constraint(expr=m.y == m.k * m.x)
+    return m
+
+
+class FakeSolver:
+    """Solves y = k*x for y, counting calls."""
+
+    def __init__(self, m):
+        self.m = m
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.m.y.value = self.m.k.value * self.m.x.value
+        results = SolverResults()
+        results.solver.termination_condition = TerminationCondition.optimal
+        return results
+
+
+def test_no_active_cache():
+    m = make_model()
+    solve = FakeSolver(m)
+    assert active_cache() is None
+    cached_solve(m, solve)
+    cached_solve(m, solve)
+    assert solve.calls == 2
+
+
+def test_hit_restores_values():
+    m = make_model()
+    solve = FakeSolver(m)
+    m.x.fix(3)
+    with SolutionCache() as cache:
+        assert active_cache() is cache
+        cached_solve(m, solve)
+        m.y.value = 0
+        res = cached_solve(m, solve)
+        assert res.solver.termination_condition == TerminationCondition.optimal
+        assert solve.calls == 1
+        assert m.y.value == 6
+        # different fixed input or parameter value: solved again
+        m.x.fix(4)
+        cached_solve(m, solve)
+        m.k = 3
+        cached_solve(m, solve)
+        assert solve.calls == 3
+        assert (cache.hits, cache.misses) == (1, 3)
+        # different structure
+        m.c.deactivate()
+        assert cache.key(m) != cache.key(make_model())
+
+
+def test_lru_and_disk(tmp_path):
+    m = make_model()
+    solve = FakeSolver(m)
+    cache = SolutionCache(max_entries=2, path=tmp_path)
+    for x in [1, 2, 3]:
+        m.x.fix(x)
+        cached_solve(m, solve, cache=cache)
+    assert len(cache) == 2
+
+    # a new cache with the same path finds all solutions on disk
+    cache = SolutionCache(path=tmp_path)
+    m.x.fix(1)
+    m.y.value = 0
+    cached_solve(m, solve, cache=cache)
+    assert solve.calls == 3
+    assert m.y.value == 2
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
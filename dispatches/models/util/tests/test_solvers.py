@@ -0,0 +1,134 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.models.util.solvers
+"""
+import os
+
+import pytest
+
+from pyomo.environ import (ConcreteModel, Constraint, Objective,
+                           SolverFactory, TerminationCondition, Var, value)
+from pyomo.opt.solver import SystemCallSolver
+
+from dispatches.models.util import solvers
+from dispatches.models.util.instrumentation import Collector, instrument
+from dispatches.models.util.solvers import get_solver
+
+
+class FakeSolver:
+    def __init__(self):
+        self.calls = []
+
+    def available(self, exception_flag=False):
+        return True
+
+    def solve(self, model, **kwargs):
+        self.calls.append(kwargs)
+        return "results"
+
+
+def test_shared_backend_and_options(monkeypatch):
+    fake = FakeSolver()
+    monkeypatch.setattr(solvers, "_backends", {"fake": fake})
+    s1 = get_solver("fake", {"tol": 1e-8})
+    s2 = get_solver("fake")
+    assert s1.backend is s2.backend is fake
+
+    m = ConcreteModel()
+    assert s1.solve(m, options={"max_iter": 5}) == "results"
+    assert fake.calls[-1] == {"tee": False,
+                              "options": {"tol": 1e-8, "max_iter": 5}}
+    s2.solve(m, tee=True)
+    assert fake.calls[-1] == {"tee": True, "options": {}}
+    # per-solve options do not stick to the session
+    assert s1.options == {"tol": 1e-8}
+
+
+def test_objective_for_in_process_backend(monkeypatch):
+    class ObjectiveSolver(FakeSolver):
+        def solve(self, model, **kwargs):
+            self.objectives = list(model.component_objects(Objective))
+            return "results"
+
+    fake = ObjectiveSolver()
+    monkeypatch.setattr(solvers, "_backends", {"fake": fake})
+    m = ConcreteModel()
+    assert get_solver("fake").solve(m) == "results"
+    assert len(fake.objectives) == 1
+    # the objective is only there during the solve
+    assert list(m.component_objects(Objective)) == []
+    m.obj = Objective(expr=1)
+    get_solver("fake").solve(m)
+    assert fake.objectives == [m.obj]
+
+
+def test_ipopt_backend_order(monkeypatch):
+    fake = FakeSolver()
+    monkeypatch.setattr(solvers, "_backends", {})
+    monkeypatch.setenv("DISPATCHES_IPOPT_BACKENDS", "no-such-solver, fake")
+    monkeypatch.setattr(solvers, "SolverFactory",
+                        lambda name: fake if name == "fake" else
+                        SolverFactory(name))
+    assert get_solver().backend is fake
+    assert get_solver().backend is fake
+
+
+def test_executable_fallback(monkeypatch):
+    monkeypatch.setattr(solvers, "_backends", {})
+    monkeypatch.setenv("DISPATCHES_IPOPT_BACKENDS", "ipopt")
+    solver = get_solver()
+    assert isinstance(solver.backend, SystemCallSolver)
+    # the log file for the iteration count is passed through the session
+    with Collector():
+        with instrument(ConcreteModel(), "solve") as event:
+            kwargs = event.solve_kwargs(solver)
+    assert "logfile" in kwargs
+    os.remove(kwargs["logfile"])
+
+
+@pytest.mark.parametrize("backend", solvers.IPOPT_BACKENDS)
+def test_square_model_without_objective(monkeypatch, backend):
+    # every solve in DISPATCHES is square, without an objective
+    monkeypatch.setattr(solvers, "_backends", {})
+    monkeypatch.setenv("DISPATCHES_IPOPT_BACKENDS", backend)
+    solver = get_solver()
+    if not solver.available():
+        pytest.skip("%s is not available" % backend)
+    m = ConcreteModel()
+    m.x = Var(initialize=1)
+    m.y = Var(initialize=1)
+    m.c1 = Constraint(expr=m.x ** 2 == 4)
+    m.c2 = Constraint(expr=m.y == 2 * m.x)
+    results = solver.solve(m)
+    assert results.solver.termination_condition == \
+        TerminationCondition.optimal
+    assert value(m.x) == pytest.approx(2)
+    assert value(m.y) == pytest.approx(4)
+
+
+def test_cyipopt_iterations(monkeypatch):
+    monkeypatch.setattr(solvers, "_backends", {})
+    monkeypatch.setenv("DISPATCHES_IPOPT_BACKENDS", "cyipopt")
+    solver = get_solver()
+    if not solver.available():
+        pytest.skip("cyipopt is not available")
+    m = ConcreteModel()
+    m.x = Var(initialize=1)
+    m.c = Constraint(expr=m.x ** 2 == 4)
+    with Collector() as events:
+        with instrument(m, "solve") as event:
+            event.record_results(solver.solve(m, **event.solve_kwargs(solver)))
+    assert events.events[0]["iterations"] > 0
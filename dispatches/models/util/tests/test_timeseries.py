@@ -0,0 +1,107 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.models.util.timeseries
+"""
+import numpy as np
+import pytest
+
+from pyomo.environ import Block, ConcreteModel, Param, Set, Var, value
+from pyomo.network import Port
+
+from dispatches.models.util.timeseries import (fix_timeseries,
+                                               load_timeseries,
+                                               set_timeseries,
+                                               unfix_timeseries)
+
+
+def make_model(n=24):
+    m = ConcreteModel()
+    m.time = Set(initialize=range(n), ordered=True)
+    m.comps = Set(initialize=["h2", "h2o"], ordered=True)
+    m.unit = Block()
+    m.unit.x = Var(m.time, initialize=0)
+    m.unit.frac = Var(m.time, m.comps, initialize=0)
+    m.unit.price = Param(m.time, initialize=0, mutable=True)
+    m.unit.inlet = Port(initialize={"x": m.unit.x, "frac": m.unit.frac})
+    return m
+
+
+def test_fix_unfix():
+    m = make_model()
+    profile = np.arange(24) * 1.5
+    fix_timeseries(m.unit.x, profile)
+    assert all(v.fixed for v in m.unit.x.values())
+    assert [value(m.unit.x[t]) for t in m.time] == profile.tolist()
+
+    unfix_timeseries(m.unit.x)
+    assert not any(v.fixed for v in m.unit.x.values())
+    assert value(m.unit.x[3]) == 4.5
+    unfix_timeseries(m.unit.x, 2.0)
+    assert value(m.unit.x[3]) == 2.0
+
+
+def test_port_member_and_param():
+    m = make_model(3)
+    frac = np.array([[0.1, 0.9], [0.2, 0.8], [0.3, 0.7]])
+    fix_timeseries(m.unit.inlet.frac, frac)
+    assert m.unit.frac[1, "h2o"].fixed
+    assert value(m.unit.frac[2, "h2"]) == 0.3
+
+    set_timeseries(m.unit.price, [10, 20, 30])
+    assert value(m.unit.price[1]) == 20
+    m.unit.fixed_price = Param(m.time, initialize=0)
+    with pytest.raises(TypeError):
+        set_timeseries(m.unit.fixed_price, [1, 2, 3])
+    with pytest.raises(ValueError):
+        fix_timeseries(m.unit.x, [1, 2])
+
+
+def test_time_not_first():
+    m = make_model(3)
+    m.unit.comp_frac = Var(m.comps, m.time, initialize=0)
+    frac = np.array([[0.1, 0.9], [0.2, 0.8], [0.3, 0.7]])
+    fix_timeseries(m.unit.comp_frac, frac, time=m.time)
+    assert value(m.unit.comp_frac["h2", 2]) == 0.3
+    assert value(m.unit.comp_frac["h2o", 0]) == 0.9
+    # a flat array is in the index order of the component
+    fix_timeseries(m.unit.comp_frac, [1, 2, 3, 4, 5, 6], time=m.time)
+    assert value(m.unit.comp_frac["h2o", 0]) == 4
+    with pytest.raises(ValueError):
+        fix_timeseries(m.unit.comp_frac, frac.T, time=m.time)
+    with pytest.raises(ValueError):
+        fix_timeseries(m.unit.comp_frac, frac, time=Set(initialize=[0]))
+
+
+def test_load_timeseries():
+    m = make_model(4)
+    load_timeseries(m.unit, {"x": [1, 2, 3, 4], "inlet.frac": 0.5}, fix=False)
+    assert not m.unit.x[0].fixed
+    assert value(m.unit.x[3]) == 4
+    assert value(m.unit.frac[3, "h2"]) == 0.5
+    with pytest.raises(KeyError):
+        load_timeseries(m.unit, {"y": 1})
+
+
+def test_pandas_series():
+    pd = pytest.importorskip("pandas")
+    m = make_model(3)
+    series = pd.Series([3.0, 1.0, 2.0], index=[2, 0, 1])
+    fix_timeseries(m.unit.x, series)
+    assert value(m.unit.x[0]) == 3.0
+    fix_timeseries(m.unit.x, series, align=True)
+    assert [value(m.unit.x[t]) for t in m.time] == [1.0, 2.0, 3.0]
+    with pytest.raises(KeyError):
+        fix_timeseries(m.unit.x, series.iloc[:2], align=True)
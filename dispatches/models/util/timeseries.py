@@ -0,0 +1,187 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Bulk loading of time series into time-indexed Vars and Params.
+
+Setting a profile one element at a time, as in ``m.fs.unit.electricity[t].fix(x)``,
+looks up every index through the component. The functions here walk the data
+objects of the component once, in index order, and assign the values from a
+NumPy array, a list, a scalar (used for every element), a pandas Series or a
+:class:`~dispatches.models.util.profiles.Profile`, which is converted to the
+units of the component::
+
+    fix_timeseries(m.fs.unit.electricity, electricity)
+    fix_timeseries(m.fs.charge_hx.inlet_2.temperature, oil_temperature)
+    load_timeseries(m.fs.unit, {"electricity": electricity,
+                                "electricity_to_mol": 5.0})
+
+Other values are in the units of the component. Components indexed by more
+than time, e.g. a port member indexed by (time, component), take a 2-D array
+with one row per time point, whatever the position of time in their index.
+A flat array is assigned in the index order of the component.
+"""
+import numpy as np
+
+from pyomo.environ import Param, units as pyunits
+
+
+def _time_position(component, time):
+    # position of the time set among the indexing sets of component
+    block = component.parent_block()
+    while time is None and block is not None:
+        # the time set of the enclosing flowsheet
+        time = getattr(getattr(block, "config", None), "time", None)
+        block = block.parent_block()
+    if time is None:
+        # not part of a flowsheet: time is taken to be the first index
+        return 0
+    subsets = list(component.index_set().subsets())
+    for pos, s in enumerate(subsets):
+        if s is time:
+            return pos
+    if len(subsets) == 1:
+        # a single multi-dimensional set, e.g. a reference; IDAES indexes
+        # these by time first
+        return 0
+    raise ValueError("%s is not indexed by time" % component.name)
+
+
+def _as_array(component, values, align, time=None):
+    if hasattr(values, "values_in"):
+        # Profile: convert to the units of the component
+        units = None if values.units is None else \
+            pyunits.get_units(next(iter(component.values())))
+        values = values.values_in(units)
+    if align and hasattr(values, "reindex"):
+        # pandas Series: select the values by time label rather than position
+        keys = list(component.keys())
+        values = values.reindex(keys)
+        missing = values.isna().to_numpy()
+        if missing.any():
+            raise KeyError("No values for %s at %s" % (
+                component.name, [k for k, m in zip(keys, missing) if m][:5]))
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy()
+    n = len(component)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 0:
+        return np.full(n, float(values))
+    if values.ndim > 1 and component.dim() > 1:
+        pos = _time_position(component, time)
+        if pos > 0:
+            # rows are time points; move them to the position of time
+            sizes = [len(s) for s in component.index_set().subsets()]
+            shape = [sizes[pos]] + sizes[:pos] + sizes[pos + 1:]
+            if values.shape[0] != shape[0] or \
+                    values.size != int(np.prod(shape)):
+                raise ValueError("Expected an array of shape %s for %s, got %s" %
+                                 (tuple(shape), component.name, values.shape))
+            values = np.moveaxis(values.reshape(shape), 0, pos)
+    values = values.ravel()
+    if len(values) != n:
+        raise ValueError("Expected %d values for %s, got %d" %
+                         (n, component.name, len(values)))
+    return values
+
+
+def set_timeseries(component, values, align=False, time=None):
+    """
+    Set the values of an indexed Var or mutable Param, without changing
+    which variables are fixed.
+
+    Args:
+        component: indexed Var, mutable Param or port member
+        values: scalar, array-like with one value per index of the
+                component, pandas Series or Profile
+        align: if True and values is a pandas Series, match values to the
+               component by index label instead of by position
+        time: time set, used to find the time axis of a component indexed
+              by more than time (default: the time set of the flowsheet of
+              the component, or its first index outside a flowsheet)
+
+    Returns:
+        None
+    """
+    if component.ctype is Param and not component.mutable:
+        raise TypeError("Param %s is not mutable" % component.name)
+    values = _as_array(component, values, align, time)
+    for data, v in zip(component.values(), values.tolist()):
+        data.value = v
+
+
+def fix_timeseries(component, values, align=False, time=None):
+    """
+    Fix every element of an indexed Var to the given values. For a mutable
+    Param this is the same as set_timeseries.
+
+    Args: see set_timeseries
+
+    Returns:
+        None
+    """
+    if component.ctype is Param:
+        set_timeseries(component, values, align, time)
+        return
+    values = _as_array(component, values, align, time)
+    for data, v in zip(component.values(), values.tolist()):
+        data.fix(v)
+
+
+def unfix_timeseries(component, values=None, align=False, time=None):
+    """
+    Unfix every element of an indexed Var, optionally setting new initial
+    values at the same time.
+
+    Args:
+        component: indexed Var or port member
+        values: None to keep the current values, otherwise as for
+                set_timeseries
+        align, time: see set_timeseries
+
+    Returns:
+        None
+    """
+    if values is None:
+        for data in component.values():
+            data.unfix()
+        return
+    values = _as_array(component, values, align, time)
+    for data, v in zip(component.values(), values.tolist()):
+        data.unfix()
+        data.value = v
+
+
+def load_timeseries(block, profiles, fix=True, align=False, time=None):
+    """
+    Load several time series into the components of a block.
+
+    Args:
+        block: block the component names are relative to, e.g. a unit model
+        profiles: dict of component name (e.g. "electricity" or
+                  "inlet_1.flow_mol") to values
+        fix: True to fix the variables, False to only set their values
+        align, time: see set_timeseries
+
+    Returns:
+        None
+    """
+    for name, values in profiles.items():
+        component = block.find_component(name)
+        if component is None:
+            raise KeyError("%s has no component %s" % (block.name, name))
+        if fix:
+            fix_timeseries(component, values, align, time)
+        else:
+            set_timeseries(component, values, align, time)
@@ -1,2 +1,2 @@
 # expose selected objects in package namespace
-from .workflow import ManagedWorkflow
\ No newline at end of file
+from .workflow import ManagedWorkflow, register_dataset_type, dataset_types
@@ -0,0 +1,333 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Persistent, content-addressed cache for workflow datasets.
+
+Each entry lives in its own directory, ``<root>/<type>/<key>/``, where ``key`` is a
+hash of the keyword arguments used to create the dataset. The entry holds a
+``manifest.json`` with the dataset metadata and the size and modification time
+of every file in the dataset directory, so a warm start can rebuild the dataset
+without downloading or scanning anything.
+
+A dataset directory inside the cache root (e.g. one a dataset factory created
+there) belongs to the cache: its size counts towards the size limit, and it is
+deleted together with the entry when the entry is evicted. Dataset directories
+elsewhere, such as Prescient's download directory, are never deleted.
+"""
+# stdlib
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import sys
+import time
+# package
+from .files import FileIndex
+
+_log = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE) -> str:
+    """Compute the SHA-256 hex digest of a file, reading it in chunks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_manifest(directory, checksums=True) -> dict:
+    """Build a manifest of all files under `directory`.
+
+    Args:
+        directory: Directory to scan
+        checksums: If True, read every file to compute its checksum. Otherwise
+                   only stat the files and record their modification time.
+    Returns:
+        Dict mapping each relative (POSIX-style) file path to a dict with its
+        ``size`` in bytes and either its ``sha256`` digest or its ``mtime_ns``.
+    """
+    directory = Path(directory)
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            rel = path.relative_to(directory).as_posix()
+            st = path.stat()
+            if checksums:
+                files[rel] = {"size": st.st_size, "sha256": file_digest(path)}
+            else:
+                files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return files
+
+
+def kwargs_key(kwargs) -> str:
+    """Stable hash of dataset creation keyword arguments.
+    """
+    text = json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_value(value):
+    if isinstance(value, Path):
+        return {"__path__": str(value)}
+    if isinstance(value, FileIndex):
+        return {"__files__": str(value.root)}
+    # the columnar module (and numpy) is only loaded if a dataset uses it
+    columnar = sys.modules.get(__package__ + ".columnar", None)
+    if columnar is not None and isinstance(value, columnar.ColumnarStore):
+        return {"__columnar__": str(value.root)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and len(value) == 1:
+        if "__path__" in value:
+            return Path(value["__path__"])
+        if "__files__" in value:
+            return FileIndex(value["__files__"])
+        if "__columnar__" in value:
+            from .columnar import ColumnarStore
+            return ColumnarStore(value["__columnar__"])
+    return value
+
+
+class DatasetCache:
+    """On-disk cache of datasets, keyed by dataset type and creation arguments.
+
+    Entries are evicted, oldest first, when they are older than `max_age` seconds
+    or when the total size of the cache exceeds `max_bytes`. Either limit may be
+    None, in which case it is not enforced. If the dataset directory of an entry
+    is inside `root`, its size is included in the size of the entry and it is
+    removed along with the entry.
+    """
+
+    def __init__(self, root, max_bytes=None, max_age=None):
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @property
+    def root(self):
+        return self._root
+
+    def entry_path(self, type_, kwargs) -> Path:
+        """Directory for the cache entry of this dataset type and arguments.
+        """
+        return self._root / type_ / kwargs_key(kwargs)
+
+    def get(self, type_, kwargs, verify=False):
+        """Load a cached dataset.
+
+        Args:
+            type_: Dataset type
+            kwargs: Keyword arguments the dataset was created with
+            verify: If True, reject the entry if any file in the dataset
+                    directory was added, removed or modified since it was
+                    cached. Otherwise only check that the directory still exists.
+        Returns:
+            The cached :class:`Dataset`, or None if there is no valid entry.
+        """
+        # imported here to avoid a circular import
+        from .workflow import Dataset
+
+        manifest_path = self.entry_path(type_, kwargs) / MANIFEST_NAME
+        try:
+            with manifest_path.open("r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(manifest):
+            _log.info(f"Cache entry for '{type_}' expired")
+            self._remove(manifest_path.parent, manifest)
+            return None
+        try:
+            meta = {k: _decode_value(v) for k, v in manifest["meta"].items()}
+        except (OSError, ValueError):
+            return None
+        directory = meta.get("directory", None)
+        if directory is not None:
+            if not Path(directory).is_dir():
+                return None
+            if verify and build_manifest(directory, checksums=False) != manifest["files"]:
+                _log.warning(f"Cache entry for '{type_}' does not match its files")
+                return None
+        dataset = Dataset(manifest["name"])
+        for key, value in meta.items():
+            dataset.add_meta(key, value)
+        return dataset
+
+    def put(self, type_, kwargs, dataset):
+        """Add a dataset to the cache, then apply the eviction policy.
+
+        Datasets with metadata that cannot be stored as JSON are not cached.
+
+        Returns:
+            Path to the new cache entry directory, or None if the dataset
+            was not cached
+        """
+        entry = self.entry_path(type_, kwargs)
+        meta = dataset.meta
+        directory = meta.get("directory", None)
+        files = build_manifest(directory, checksums=False) if directory is not None else {}
+        manifest = {
+            "name": dataset.name,
+            "type": type_,
+            "kwargs": json.loads(json.dumps(kwargs, default=str)),
+            "created": time.time(),
+            "meta": {k: _encode_value(v) for k, v in meta.items()},
+            "files": files,
+            "size": sum(f["size"] for f in files.values()),
+        }
+        try:
+            text = json.dumps(manifest, indent=1)
+        except (TypeError, ValueError) as err:
+            _log.warning(f"Not caching dataset '{type_}': {err}")
+            return None
+        entry.mkdir(parents=True, exist_ok=True)
+        # write-then-rename so readers never see a partial manifest
+        tmp_path = entry / (MANIFEST_NAME + ".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, entry / MANIFEST_NAME)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        self.evict()
+        return entry
+
+    def entries(self):
+        """List the cache entries.
+
+        Returns:
+            List of ``(path, created, size)`` tuples, oldest first. The size
+            includes the dataset directory of the entry if the cache owns it.
+        """
+        return [(e, m["created"], _dir_size(e) + self._data_size(m))
+                for e, m in self._manifests()]
+
+    def evict(self):
+        """Remove expired entries, then the oldest entries until under `max_bytes`.
+
+        Removing an entry also removes its dataset directory if it is inside the
+        cache root, and with it any other entry for the same directory.
+
+        Returns:
+            List of removed entry directories
+        """
+        removed = []
+        entries = self._manifests()
+        now = time.time()
+        if self.max_age is not None:
+            for item in list(entries):
+                if now - item[1]["created"] > self.max_age:
+                    self._remove(*item)
+                    removed.append(item[0])
+                    entries.remove(item)
+        if self.max_bytes is not None:
+            # a directory shared by several entries is only counted once
+            sizes = {self._owned_directory(m): self._data_size(m)
+                     for _, m in entries}
+            sizes.pop(None, None)
+            total = sum(sizes.values()) + sum(_dir_size(e) for e, _ in entries)
+            while entries and total > self.max_bytes:
+                entry, manifest = entries.pop(0)
+                directory = self._owned_directory(manifest)
+                total -= _dir_size(entry) + sizes.pop(directory, 0)
+                self._remove(entry, manifest)
+                removed.append(entry)
+                if directory is None:
+                    continue
+                for item in [i for i in entries
+                             if self._owned_directory(i[1]) == directory]:
+                    total -= _dir_size(item[0])
+                    self._remove(item[0])
+                    removed.append(item[0])
+                    entries.remove(item)
+        return removed
+
+    def clear(self):
+        """Remove all entries, and their dataset directories, from the cache.
+        """
+        for entry, manifest in self._manifests():
+            self._remove(entry, manifest)
+
+    def _manifests(self):
+        # (entry path, manifest) of every readable entry, oldest first
+        result = []
+        for manifest_path in self._root.glob("*/*/" + MANIFEST_NAME):
+            try:
+                with manifest_path.open("r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not isinstance(manifest, dict) or "created" not in manifest:
+                continue
+            result.append((manifest_path.parent, manifest))
+        result.sort(key=lambda e: e[1]["created"])
+        return result
+
+    def _expired(self, manifest):
+        if self.max_age is None:
+            return False
+        return time.time() - manifest.get("created", 0) > self.max_age
+
+    def _owned_directory(self, manifest):
+        # dataset directory of an entry, as a string, if it is inside the
+        # cache root; the manifest may be stale or foreign, so never trust it
+        # with paths elsewhere
+        directory = manifest.get("meta", {}).get("directory", None)
+        if directory is None:
+            return None
+        root = self._root.resolve()
+        try:
+            path = Path(_decode_value(directory)).resolve()
+            path.relative_to(root)
+        except (TypeError, ValueError):
+            return None
+        return None if path == root else str(path)
+
+    def _data_size(self, manifest):
+        if self._owned_directory(manifest) is None:
+            return 0
+        return manifest.get("size", 0)
+
+    def _remove(self, entry, manifest=None):
+        _log.debug(f"Removing cache entry {entry}")
+        shutil.rmtree(entry, ignore_errors=True)
+        directory = self._owned_directory(manifest) if manifest is not None else None
+        if directory is not None:
+            _log.debug(f"Removing dataset directory {directory}")
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
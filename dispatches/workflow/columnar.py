@@ -0,0 +1,182 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Columnar, memory-mappable copy of the RTS-GMLC timeseries.
+
+Each timeseries CSV (e.g. ``Load/DAY_AHEAD_regional_Load.csv``) becomes a
+"table" directory holding one ``.npy`` file per column. Columns are opened with
+``mmap_mode="r"``, so slicing a horizon out of a column does not copy or parse
+anything.
+
+The index of a store records a fingerprint of the CSV files it was converted
+from, so a store left over from an older download is detected and rebuilt.
+"""
+# stdlib
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+# third-party
+import numpy as np
+# package
+from .files import FileIndex
+
+_log = logging.getLogger(__name__)
+
+#: Location of the timeseries CSVs within the RTS-GMLC directory
+TIMESERIES_SUBDIR = Path("RTS_Data") / "timeseries_data_files"
+INDEX_NAME = "index.json"
+
+
+def _timeseries_dir(source, subdir):
+    source = Path(source)
+    return source / subdir if (source / subdir).is_dir() else source
+
+
+def fingerprint(source, subdir=TIMESERIES_SUBDIR) -> str:
+    """Fingerprint of the timeseries CSV files under `source`.
+
+    Only the names, sizes and modification times of the files are used, so this
+    is cheap, and it changes whenever a file is added, removed or rewritten.
+    """
+    source = _timeseries_dir(source, subdir)
+    h = hashlib.sha256()
+    for rel in FileIndex(source).glob("*.csv"):
+        st = (source / rel).stat()
+        h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def convert(source, dest, subdir=TIMESERIES_SUBDIR):
+    """Convert timeseries CSV files into a columnar store.
+
+    Args:
+        source: RTS-GMLC directory
+        dest: Directory for the columnar store; created if needed
+        subdir: Subdirectory of `source` to convert. If it does not exist, all CSV
+                files under `source` are converted.
+    Returns:
+        :class:`ColumnarStore` for `dest`
+    """
+    source, dest = _timeseries_dir(source, subdir), Path(dest)
+    source_fingerprint = fingerprint(source, subdir)
+    index = {}
+    for rel in FileIndex(source).glob("*.csv"):
+        table = rel[:-len(".csv")]
+        path = source / rel
+        with path.open("r", newline="") as f:
+            header = f.readline().strip().split(",")
+            try:
+                data = np.loadtxt(f, delimiter=",", dtype=np.float64, ndmin=2)
+            except ValueError as err:
+                _log.warning(f"Skipping non-numeric table '{table}': {err}")
+                continue
+        table_dir = dest / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+        for i in range(len(header)):
+            # contiguous copy so each column file can be mapped on its own
+            np.save(table_dir / ("%d.npy" % i), np.ascontiguousarray(data[:, i]))
+        index[table] = {"columns": header, "rows": int(data.shape[0])}
+        _log.debug(f"Converted {rel} ({data.shape[0]} rows)")
+    # the index is written last and marks the conversion as complete
+    tmp_path = dest / (INDEX_NAME + ".tmp")
+    dest.mkdir(parents=True, exist_ok=True)
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"fingerprint": source_fingerprint, "tables": index}, f, indent=1)
+    os.replace(tmp_path, dest / INDEX_NAME)
+    return ColumnarStore(dest)
+
+
+def is_converted(dest, source=None, subdir=TIMESERIES_SUBDIR) -> bool:
+    """Whether `dest` holds a complete columnar store.
+
+    Args:
+        dest: Directory of the columnar store
+        source: If given, also check that the store was converted from the
+                current files in this RTS-GMLC directory
+        subdir: See :func:`convert`
+    """
+    try:
+        with (Path(dest) / INDEX_NAME).open("r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if source is None:
+        return True
+    return index.get("fingerprint", None) == fingerprint(source, subdir)
+
+
+class ColumnarStore:
+    """Read-only access to a columnar store created by :func:`convert`.
+    """
+
+    def __init__(self, root):
+        self._root = Path(root)
+        with (self._root / INDEX_NAME).open("r", encoding="utf-8") as f:
+            self._index = json.load(f)["tables"]
+        self._arrays = {}
+
+    @property
+    def root(self):
+        return self._root
+
+    @property
+    def tables(self):
+        """Names of the tables, e.g. ``"Load/DAY_AHEAD_regional_Load"``.
+        """
+        return list(self._index.keys())
+
+    def columns(self, table):
+        """Column names of `table`, in file order.
+        """
+        return list(self._index[table]["columns"])
+
+    def num_rows(self, table):
+        return self._index[table]["rows"]
+
+    def column(self, table, name, start=None, stop=None):
+        """Read-only, memory-mapped view of rows ``start:stop`` of a column.
+        """
+        key = (table, name)
+        arr = self._arrays.get(key, None)
+        if arr is None:
+            try:
+                i = self._index[table]["columns"].index(name)
+            except ValueError:
+                raise KeyError("No column '%s' in table '%s'" % (name, table))
+            arr = np.load(self._root / table / ("%d.npy" % i), mmap_mode="r")
+            self._arrays[key] = arr
+        return arr[start:stop]
+
+    def table(self, table, start=None, stop=None, columns=None):
+        """Rows ``start:stop`` of the given columns (default: all) of a table.
+
+        Returns:
+            Dict mapping column name to a memory-mapped array view
+        """
+        if columns is None:
+            columns = self._index[table]["columns"]
+        return {c: self.column(table, c, start=start, stop=stop) for c in columns}
+
+    def __getstate__(self):
+        # memory maps are reopened on demand after unpickling
+        return {"_root": self._root, "_index": self._index, "_arrays": {}}
+
+    def __str__(self):
+        return str(self._root)
+
+    def __repr__(self):
+        return "ColumnarStore(%r)" % str(self._root)
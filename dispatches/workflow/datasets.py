@@ -0,0 +1,68 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Built-in dataset types.
+
+This module is only imported when one of its dataset types is first created,
+see :func:`dispatches.workflow.workflow.register_dataset_type`.
+"""
+# stdlib
+import shutil
+# package
+from . import rts_gmlc
+from . import columnar
+from .files import FileIndex
+from .workflow import Dataset
+
+
+def rts_gmlc_dataset(mirror=None, **kwargs):
+    """RTS-GMLC data directory, downloaded if needed.
+
+    Args:
+        mirror: Passed to :func:`rts_gmlc.download`
+    """
+    rts_gmlc_dir = rts_gmlc.download(mirror=mirror)
+    dataset = Dataset("rts-gmlc")
+    dataset.add_meta("directory", rts_gmlc_dir)
+    dataset.add_meta("files", FileIndex(rts_gmlc_dir))
+    return dataset
+
+
+def rts_gmlc_columnar_dataset(directory=None, mirror=None, **kwargs):
+    """Convert the RTS-GMLC timeseries to a columnar store, once.
+
+    Args:
+        directory: Where to put the columnar store. Default is a
+                   sibling of the RTS-GMLC directory.
+        mirror: Passed to :func:`rts_gmlc.download`
+    """
+    rts_gmlc_dir = rts_gmlc.download(mirror=mirror)
+    if directory is None:
+        directory = rts_gmlc_dir.parent / "RTS-GMLC-columnar"
+    if columnar.is_converted(directory, rts_gmlc_dir):
+        store = columnar.ColumnarStore(directory)
+    else:
+        # start over, so no columns of an older download are left behind
+        shutil.rmtree(directory, ignore_errors=True)
+        store = columnar.convert(rts_gmlc_dir, directory)
+    dataset = Dataset("rts-gmlc-columnar")
+    dataset.add_meta("directory", store.root)
+    dataset.add_meta("source", rts_gmlc_dir)
+    dataset.add_meta("columnar", store)
+    return dataset
+
+
+def null_dataset(**kwargs):
+    return None  # XXX: or do we need a NullDataset subclass?
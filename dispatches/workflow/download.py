@@ -0,0 +1,186 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Incremental, resumable, parallel download of a dataset from a mirror.
+
+A mirror is any URL (``http(s)://`` or ``file://``) or local directory that
+holds the dataset files plus a ``manifest.json`` listing them, in the format
+of :func:`dispatches.workflow.cache.build_manifest`. Use :func:`write_manifest`
+to create one.
+
+Completed files are recorded in a local state file in the destination
+directory, so an interrupted download resumes with the files it is missing.
+Partially downloaded files are kept and, where the server supports HTTP
+range requests, continued rather than restarted.
+"""
+# stdlib
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+# package
+from .cache import CHUNK_SIZE, build_manifest, file_digest
+
+_log = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+STATE_NAME = ".dispatches-download.json"
+
+
+class DownloadError(Exception):
+    pass
+
+
+def write_manifest(directory) -> Path:
+    """Write the ``manifest.json`` for a mirror of the files in `directory`.
+    """
+    directory = Path(directory)
+    files = build_manifest(directory)
+    files.pop(MANIFEST_NAME, None)
+    files.pop(STATE_NAME, None)
+    path = directory / MANIFEST_NAME
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(files, f, indent=1)
+    return path
+
+
+def _base_url(mirror) -> str:
+    mirror = str(mirror)
+    if "://" not in mirror:
+        mirror = Path(mirror).resolve().as_uri()
+    return mirror.rstrip("/")
+
+
+def fetch(mirror, dest, max_workers=8, timeout=60):
+    """Bring `dest` up to date with a mirror.
+
+    Only files that are missing locally, or whose checksum differs from the
+    mirror manifest, are downloaded. Files are fetched in parallel threads.
+
+    Args:
+        mirror: Base URL or local directory of the mirror
+        dest: Destination directory; created if needed
+        max_workers: Number of parallel downloads
+        timeout: Socket timeout per request, in seconds
+    Returns:
+        List of relative paths of the files that were downloaded
+    Raises:
+        DownloadError: if any file could not be downloaded or failed its
+                       checksum. Files that did succeed are kept. Also if
+                       the manifest names a file outside `dest`, in which
+                       case nothing is downloaded.
+    """
+    base = _base_url(mirror)
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    with urlopen(base + "/" + MANIFEST_NAME, timeout=timeout) as resp:
+        remote = json.loads(resp.read().decode("utf-8"))
+    paths = {rel: _local_path(dest, rel) for rel in remote}
+    state = _State(dest / STATE_NAME)
+
+    todo = []
+    for rel, info in remote.items():
+        path = paths[rel]
+        if state.get(rel) == info and path.is_file() and \
+                path.stat().st_size == info["size"]:
+            continue
+        # a file from an earlier, unrecorded download may already be good
+        if path.is_file() and path.stat().st_size == info["size"] and \
+                file_digest(path) == info["sha256"]:
+            state.set(rel, info)
+            continue
+        todo.append(rel)
+    _log.info(f"Fetching {len(todo)} of {len(remote)} files from {base}")
+
+    def fetch_one(rel):
+        _fetch_file(base + "/" + quote(rel), paths[rel], remote[rel], timeout)
+        state.set(rel, remote[rel])
+        return rel
+
+    errors, fetched = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_one, rel): rel for rel in todo}
+        for future, rel in futures.items():
+            try:
+                fetched.append(future.result())
+            except Exception as err:
+                _log.error(f"Failed to fetch {rel}: {err}")
+                errors.append(rel)
+    if errors:
+        raise DownloadError("Failed to fetch %d file(s): %s" %
+                            (len(errors), ", ".join(errors)))
+    return fetched
+
+
+def _local_path(dest, rel):
+    # the manifest is remote input: keep every file it names inside dest
+    root = dest.resolve()
+    path = (root / rel).resolve()
+    if Path(rel).is_absolute() or ".." in Path(rel).parts or \
+            path == root or root not in path.parents or \
+            (path.parent == root and path.name in (MANIFEST_NAME, STATE_NAME)):
+        raise DownloadError("Invalid file path in manifest: %r" % rel)
+    return path
+
+
+def _fetch_file(url, path, info, timeout):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part = path.with_name(path.name + ".part")
+    offset = part.stat().st_size if part.is_file() else 0
+    if offset >= info["size"]:
+        offset = 0
+    request = Request(url)
+    if offset and url.startswith("http"):
+        request.add_header("Range", "bytes=%d-" % offset)
+    with urlopen(request, timeout=timeout) as resp:
+        mode = "ab" if offset and getattr(resp, "status", None) == 206 else "wb"
+        with part.open(mode) as f:
+            for chunk in iter(lambda: resp.read(CHUNK_SIZE), b""):
+                f.write(chunk)
+    if file_digest(part) != info["sha256"]:
+        part.unlink()
+        raise DownloadError("Checksum mismatch for %s" % url)
+    os.replace(part, path)
+
+
+class _State:
+    """Thread-safe record of the files fetched into a directory, saved to disk
+    after every change.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                self._files = json.load(f)
+        except (OSError, ValueError):
+            self._files = {}
+
+    def get(self, rel):
+        with self._lock:
+            return self._files.get(rel, None)
+
+    def set(self, rel, info):
+        with self._lock:
+            self._files[rel] = info
+            tmp_path = self._path.with_name(self._path.name + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(self._files, f)
+            os.replace(tmp_path, self._path)
@@ -0,0 +1,107 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Lazy access to the files of a dataset directory
+"""
+# stdlib
+import csv
+import fnmatch
+import os
+from pathlib import Path
+
+
+class FileIndex:
+    """Lazy, recursive index of the files under a directory.
+
+    Nothing is read from disk until the index is iterated. Iteration yields the
+    relative (POSIX-style) path of each file as soon as it is found, so callers
+    can start on the first file without waiting for the whole tree to be walked.
+    The result of the first complete walk is remembered.
+    """
+
+    def __init__(self, root):
+        self._root = Path(root)
+        self._files = None
+
+    @property
+    def root(self):
+        return self._root
+
+    def __iter__(self):
+        if self._files is not None:
+            yield from self._files
+            return
+        found = []
+        for rel in self._walk(self._root, ""):
+            found.append(rel)
+            yield rel
+        self._files = found
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, rel):
+        if self._files is not None:
+            return rel in self._files
+        return (self._root / rel).is_file()
+
+    def __str__(self):
+        return str(self._root)
+
+    def __repr__(self):
+        return "FileIndex(%r)" % str(self._root)
+
+    def glob(self, pattern):
+        """Iterate over relative file paths matching a shell-style `pattern`.
+        """
+        for rel in self:
+            if fnmatch.fnmatch(rel, pattern):
+                yield rel
+
+    def path(self, rel) -> Path:
+        """Full path of the file at relative path `rel`.
+        """
+        return self._root / rel
+
+    def open(self, rel, mode="r", **kwargs):
+        """Open the file at relative path `rel`.
+        """
+        if "b" not in mode:
+            kwargs.setdefault("newline", "")
+        return open(self._root / rel, mode, **kwargs)
+
+    def iter_rows(self, rel, **kwargs):
+        """Iterate over the rows of the CSV file at relative path `rel`.
+
+        Rows are read one at a time, as lists of strings. Extra keyword
+        arguments are passed to :func:`csv.reader`.
+        """
+        with self.open(rel) as f:
+            yield from csv.reader(f, **kwargs)
+
+    @classmethod
+    def _walk(cls, directory, prefix):
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.append(entry)
+            else:
+                yield prefix + entry.name
+        for entry in subdirs:
+            yield from cls._walk(entry.path, prefix + entry.name + "/")
@@ -16,12 +16,25 @@
 Wrappers for Prescient RTS-GMLC functions
 """
 from pathlib import Path
-import prescient.downloaders.rts_gmlc as rts_downloader
+from . import download as mirror_download
 
 
-def download() -> Path:
+def download(mirror=None, max_workers=8) -> Path:
     """Wraps RTS GMLC downloader.
+
+    Args:
+        mirror: If given, URL or local directory of a mirror of the RTS-GMLC
+                directory (see :mod:`dispatches.workflow.download`). Files are
+                then fetched in parallel, and only missing or changed files are
+                fetched, so an interrupted download resumes where it stopped.
+        max_workers: Number of parallel downloads from the mirror
     """
-    rts_downloader.download()
+    # imported here, so that importing dispatches.workflow does not import Prescient
+    import prescient.downloaders.rts_gmlc as rts_downloader
+
     rts_gmlc_dir = Path(rts_downloader.rts_download_path) / "RTS-GMLC"
+    if mirror is None:
+        rts_downloader.download()
+    else:
+        mirror_download.fetch(mirror, rts_gmlc_dir, max_workers=max_workers)
     return rts_gmlc_dir
@@ -0,0 +1,128 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Read-only dataset store shared by the worker processes on one node.
+
+The first process to ask for a dataset's timeseries materializes them as a
+columnar store (see :mod:`dispatches.workflow.columnar`) under a lock file.
+The other processes wait for it and then attach to the same files. All
+columns are memory-mapped read-only, so the operating system keeps a single
+copy of the data in memory for all processes.
+
+A store is keyed by its source directory and a fingerprint of the source
+files, so a new download is materialized again and the store of the old one
+is removed.
+"""
+# stdlib
+import hashlib
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+# package
+from . import columnar
+
+_log = logging.getLogger(__name__)
+
+
+class SharedStoreTimeout(Exception):
+    pass
+
+
+class SharedStore:
+    """Directory of columnar stores shared between processes.
+
+    Use a node-local directory, e.g. under ``/dev/shm`` or a local scratch disk.
+    """
+
+    def __init__(self, root, timeout=600, poll_interval=0.1):
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @property
+    def root(self):
+        return self._root
+
+    def columnar(self, source) -> columnar.ColumnarStore:
+        """Attach to the columnar store for the timeseries in `source`,
+        materializing it first if no process has done so yet.
+
+        Stores of earlier versions of the files in `source` are removed.
+        """
+        source = Path(source).resolve()
+        prefix = hashlib.sha256(str(source).encode("utf-8")).hexdigest()[:16]
+        key = prefix + "-" + columnar.fingerprint(source)
+        target = self.materialize(key, lambda dest: columnar.convert(source, dest))
+        for old in self._root.glob(prefix + "-*"):
+            if old.name != key and old.is_dir() and "." not in old.name:
+                _log.info(f"Removing outdated shared dataset {old.name}")
+                shutil.rmtree(old, ignore_errors=True)
+        return columnar.ColumnarStore(target)
+
+    def materialize(self, key, build_fn) -> Path:
+        """Return the directory for `key`, calling ``build_fn(directory)`` to
+        create it if it does not exist yet.
+
+        Exactly one process builds each directory; the others wait for it.
+        The directory only appears, by an atomic rename, once it is complete.
+
+        Raises:
+            SharedStoreTimeout: if waiting longer than `timeout` seconds
+        """
+        target = self._root / key
+        lock = self._root / (key + ".lock")
+        deadline = time.monotonic() + self.timeout
+        while not target.exists():
+            if self._acquire(lock):
+                try:
+                    if not target.exists():
+                        tmp = self._root / ("%s.tmp-%d" % (key, os.getpid()))
+                        shutil.rmtree(tmp, ignore_errors=True)
+                        _log.info(f"Materializing shared dataset {key}")
+                        build_fn(tmp)
+                        os.rename(tmp, target)
+                finally:
+                    lock.unlink()
+                break
+            if time.monotonic() > deadline:
+                raise SharedStoreTimeout(
+                    "Timed out waiting for %s (lock %s)" % (target, lock))
+            time.sleep(self.poll_interval)
+        return target
+
+    @staticmethod
+    def _acquire(lock) -> bool:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # remove the lock if the process that holds it is gone
+            try:
+                pid = int(lock.read_text())
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                _log.warning(f"Removing stale lock {lock} of process {pid}")
+                try:
+                    lock.unlink()
+                except FileNotFoundError:
+                    pass
+            except (OSError, ValueError):
+                pass
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
@@ -0,0 +1,155 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.workflow.cache
+"""
+import time
+
+import pytest
+
+from dispatches.workflow import ManagedWorkflow
+from dispatches.workflow.cache import DatasetCache, build_manifest, kwargs_key
+from dispatches.workflow.files import FileIndex
+from dispatches.workflow.workflow import Dataset
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    (d / "sub").mkdir(parents=True)
+    (d / "a.csv").write_text("x,y\n1,2\n")
+    (d / "sub" / "b.csv").write_text("x,y\n3,4\n")
+    return d
+
+
+def make_dataset(directory):
+    ds = Dataset("test")
+    ds.add_meta("directory", directory)
+    return ds
+
+
+def test_kwargs_key():
+    assert kwargs_key({"a": 1, "b": 2}) == kwargs_key({"b": 2, "a": 1})
+    assert kwargs_key({"a": 1}) != kwargs_key({"a": 2})
+
+
+def test_build_manifest(data_dir):
+    manifest = build_manifest(data_dir)
+    assert set(manifest.keys()) == {"a.csv", "sub/b.csv"}
+    assert manifest["a.csv"]["size"] == 8
+
+
+def test_put_get(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache")
+    assert cache.get("test", {}) is None
+    cache.put("test", {"year": 2020}, make_dataset(data_dir))
+    assert cache.get("test", {}) is None
+    ds = cache.get("test", {"year": 2020}, verify=True)
+    assert ds.name == "test"
+    assert ds.meta["directory"] == data_dir
+    # a modified file fails verification
+    (data_dir / "a.csv").write_text("changed")
+    assert cache.get("test", {"year": 2020}) is not None
+    assert cache.get("test", {"year": 2020}, verify=True) is None
+
+
+def test_evict_age(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache", max_age=3600)
+    cache.put("test", {}, make_dataset(data_dir))
+    assert cache.get("test", {}) is not None
+    cache.max_age = 0
+    time.sleep(0.01)
+    assert cache.get("test", {}) is None
+    assert cache.entries() == []
+
+
+def test_evict_size(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache")
+    dirs = []
+    for i in range(3):
+        # dataset directories inside the cache root belong to the cache
+        d = cache.root / "data" / str(i)
+        d.mkdir(parents=True)
+        (d / "x.bin").write_bytes(b"x" * 10000)
+        dirs.append(d)
+        cache.put("test", {"i": i}, make_dataset(d))
+        time.sleep(0.01)
+    sizes = [e[2] for e in cache.entries()]
+    assert len(sizes) == 3
+    assert all(s > 10000 for s in sizes)
+    cache.max_bytes = sum(sizes[1:])
+    removed = cache.evict()
+    assert removed == [cache.entry_path("test", {"i": 0})]
+    assert len(cache.entries()) == 2
+    # evicting the entry frees its dataset files
+    assert not dirs[0].exists()
+    assert dirs[1].exists() and dirs[2].exists()
+
+
+def test_evict_outside_root(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache")
+    cache.put("test", {"i": 0}, make_dataset(data_dir))
+    time.sleep(0.01)
+    cache.put("test", {"i": 1}, make_dataset(data_dir))
+    # files outside the cache root do not count, and are never deleted
+    assert all(e[2] < 2000 for e in cache.entries())
+    cache.max_bytes = 1
+    assert len(cache.evict()) == 2
+    assert cache.entries() == []
+    assert (data_dir / "a.csv").is_file()
+    # nor by expiry, or for a manifest pointing at the cache root itself
+    cache.max_bytes = None
+    cache.put("test", {"i": 2}, make_dataset(data_dir))
+    cache.put("test", {"i": 3}, make_dataset(cache.root))
+    cache.max_age = 0
+    time.sleep(0.01)
+    assert cache.get("test", {"i": 2}) is None
+    cache.evict()
+    assert (data_dir / "a.csv").is_file()
+    assert cache.root.is_dir()
+
+
+def test_put_not_json(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache")
+    ds = make_dataset(data_dir)
+    ds.add_meta("model", object())
+    assert cache.put("test", {}, ds) is None
+    assert cache.get("test", {}) is None
+    assert not cache.entry_path("test", {}).exists()
+
+
+def test_workflow_uses_cache(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache")
+    cache.put("rts-gmlc", {}, make_dataset(data_dir))
+    # the cached entry is used; nothing is downloaded
+    wf = ManagedWorkflow("hello", "world", cache_dir=tmp_path / "cache")
+    ds = wf.get_dataset("rts-gmlc")
+    assert ds.meta["directory"] == data_dir
+    assert wf.get_dataset("rts-gmlc") is ds
+    # with verification, a changed dataset is not used
+    (data_dir / "a.csv").write_text("changed")
+    wf = ManagedWorkflow("hello", "world", cache_dir=tmp_path / "cache",
+                         cache_verify=True)
+    assert wf.cache.get("rts-gmlc", {}, verify=True) is None
+
+
+def test_file_index_roundtrip(tmp_path, data_dir):
+    cache = DatasetCache(tmp_path / "cache")
+    ds = make_dataset(data_dir)
+    assert len(ds.files) == 2
+    cache.put("test", {}, ds)
+    cached = cache.get("test", {})
+    assert isinstance(cached.meta["files"], FileIndex)
+    assert list(cached.files) == ["a.csv", "sub/b.csv"]
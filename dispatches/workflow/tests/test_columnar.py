@@ -0,0 +1,83 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.workflow.columnar
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from dispatches.workflow import columnar
+
+
+@pytest.fixture
+def rts_dir(tmp_path):
+    d = tmp_path / "RTS-GMLC"
+    ts = d / columnar.TIMESERIES_SUBDIR / "Load"
+    ts.mkdir(parents=True)
+    lines = ["Year,Month,Day,Period,1,2"]
+    for p in range(1, 25):
+        lines.append("2020,1,1,%d,%f,%f" % (p, 100 + p, 200.5 + p))
+    (ts / "DAY_AHEAD_regional_Load.csv").write_text("\n".join(lines) + "\n")
+    (ts / "notes.csv").write_text("Name,Value\nabc,def\n")
+    return d
+
+
+def test_convert(tmp_path, rts_dir):
+    dest = tmp_path / "columnar"
+    assert not columnar.is_converted(dest)
+    store = columnar.convert(rts_dir, dest)
+    assert columnar.is_converted(dest)
+    assert columnar.is_converted(dest, rts_dir)
+    table = "Load/DAY_AHEAD_regional_Load"
+    # non-numeric tables are skipped
+    assert store.tables == [table]
+    assert store.columns(table) == ["Year", "Month", "Day", "Period", "1", "2"]
+    assert store.num_rows(table) == 24
+    col = store.column(table, "1", start=2, stop=5)
+    assert isinstance(col.base, np.memmap) or isinstance(col, np.memmap)
+    np.testing.assert_allclose(col, [103, 104, 105])
+    np.testing.assert_allclose(store.table(table, stop=1)["2"], [201.5])
+    with pytest.raises(KeyError):
+        store.column(table, "nope")
+    # reopened store is equivalent, and survives pickling
+    store2 = pickle.loads(pickle.dumps(columnar.ColumnarStore(dest)))
+    np.testing.assert_allclose(store2.column(table, "Period"), np.arange(1, 25))
+
+
+def test_columnar_dataset(tmp_path, rts_dir, monkeypatch):
+    from dispatches.workflow import ManagedWorkflow, rts_gmlc
+
+    monkeypatch.setattr(rts_gmlc, "download", lambda mirror=None: rts_dir)
+    wf = ManagedWorkflow("hello", "world")
+    ds = wf.get_dataset("rts-gmlc-columnar")
+    assert ds.meta["source"] == rts_dir
+    assert ds.meta["directory"] == rts_dir.parent / "RTS-GMLC-columnar"
+    store = ds.meta["columnar"]
+    assert store.num_rows("Load/DAY_AHEAD_regional_Load") == 24
+
+
+def test_stale_store(tmp_path, rts_dir):
+    dest = tmp_path / "columnar"
+    columnar.convert(rts_dir, dest)
+    csv = rts_dir / columnar.TIMESERIES_SUBDIR / "Load" / "DAY_AHEAD_regional_Load.csv"
+    csv.write_text("Year,Period,1\n2020,1,7.0\n")
+    # the store no longer matches the source and is rebuilt from it
+    assert columnar.is_converted(dest)
+    assert not columnar.is_converted(dest, rts_dir)
+    store = columnar.convert(rts_dir, dest)
+    assert columnar.is_converted(dest, rts_dir)
+    assert store.columns("Load/DAY_AHEAD_regional_Load") == ["Year", "Period", "1"]
@@ -0,0 +1,108 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.workflow.download
+"""
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+
+from dispatches.workflow import download
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    d = tmp_path / "mirror"
+    (d / "timeseries").mkdir(parents=True)
+    for i in range(5):
+        (d / "timeseries" / ("file %d.csv" % i)).write_text("x\n%d\n" % i)
+    (d / "readme.txt").write_text("hello")
+    download.write_manifest(d)
+    return d
+
+
+@pytest.fixture
+def http_mirror(mirror):
+    handler = partial(SimpleHTTPRequestHandler, directory=str(mirror))
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d/" % server.server_address[1]
+    server.shutdown()
+
+
+def test_write_manifest(mirror):
+    with open(mirror / download.MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    assert len(manifest) == 6
+    assert download.MANIFEST_NAME not in manifest
+
+
+def test_fetch_directory(tmp_path, mirror):
+    dest = tmp_path / "dest"
+    fetched = download.fetch(mirror, dest, max_workers=3)
+    assert len(fetched) == 6
+    assert (dest / "timeseries" / "file 3.csv").read_text() == "x\n3\n"
+    # nothing to do the second time
+    assert download.fetch(mirror, dest) == []
+    # only changed and missing files are fetched again
+    (mirror / "readme.txt").write_text("changed")
+    download.write_manifest(mirror)
+    (dest / "timeseries" / "file 0.csv").unlink()
+    assert sorted(download.fetch(mirror, dest)) == [
+        "readme.txt", "timeseries/file 0.csv"]
+    assert (dest / "readme.txt").read_text() == "changed"
+
+
+def test_fetch_http_resume(tmp_path, mirror, http_mirror):
+    dest = tmp_path / "dest"
+    # simulate an interrupted download: two files done, one partial
+    (dest / "timeseries").mkdir(parents=True)
+    (dest / "readme.txt").write_text("hello")
+    (dest / "timeseries" / "file 1.csv").write_text("x\n1\n")
+    (dest / "timeseries" / "file 2.csv.part").write_text("x\n")
+    fetched = download.fetch(http_mirror, dest)
+    assert sorted(fetched) == ["timeseries/file %d.csv" % i for i in (0, 2, 3, 4)]
+    assert (dest / "timeseries" / "file 2.csv").read_text() == "x\n2\n"
+    assert not (dest / "timeseries" / "file 2.csv.part").exists()
+
+
+def test_fetch_bad_checksum(tmp_path, mirror):
+    (mirror / "readme.txt").write_text("not what the manifest says")
+    dest = tmp_path / "dest"
+    with pytest.raises(download.DownloadError):
+        download.fetch(mirror, dest)
+    # the other files were kept
+    assert (dest / "timeseries" / "file 4.csv").exists()
+
+
+@pytest.mark.parametrize("rel", ["../outside.txt", "timeseries/../../outside.txt",
+                                 "/tmp/outside.txt", download.STATE_NAME])
+def test_fetch_rejects_paths_outside_dest(tmp_path, mirror, rel):
+    with open(mirror / download.MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    manifest[rel] = manifest["readme.txt"]
+    with open(mirror / download.MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f)
+    dest = tmp_path / "dest"
+    with pytest.raises(download.DownloadError):
+        download.fetch(mirror, dest)
+    # nothing is downloaded
+    assert not (tmp_path / "outside.txt").exists()
+    assert not (dest / "readme.txt").exists()
@@ -0,0 +1,87 @@
+##############################################################################
+# DISPATCHES was produced under the DOE Design Integration and Synthesis
+# Platform to Advance Tightly Coupled Hybrid Energy Systems program (DISPATCHES),
+# and is copyright (c) 2021 by the software owners: The Regents of the University
+# of California, through Lawrence Berkeley National Laboratory, National
+# Technology & Engineering Solutions of Sandia, LLC, Alliance for Sustainable
+# Energy, LLC, Battelle Energy Alliance, LLC, University of Notre Dame du Lac, et
+# al. All rights reserved.
+#
+# Please see the files COPYRIGHT.md and LICENSE.md for full copyright and license
+# information, respectively. Both files are also available online at the URL:
+# "https://github.com/gmlc-dispatches/dispatches".
+#
+##############################################################################
+"""
+Tests for dispatches.workflow.shared
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import numpy as np
+import pytest
+
+from dispatches.workflow import ManagedWorkflow, columnar, rts_gmlc
+from dispatches.workflow.shared import SharedStore, SharedStoreTimeout
+
+
+def slow_build(log_path, dest):
+    with open(log_path, "a") as f:
+        f.write("%d\n" % os.getpid())
+    time.sleep(0.2)
+    dest.mkdir()
+    (dest / "data.txt").write_text("done")
+
+
+def attach(root, log_path):
+    store = SharedStore(root, timeout=30, poll_interval=0.01)
+    target = store.materialize("key", lambda dest: slow_build(log_path, dest))
+    return (target / "data.txt").read_text()
+
+
+def test_materialize_once(tmp_path):
+    log_path = tmp_path / "builds.log"
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(attach, tmp_path / "store", log_path) for _ in range(4)]
+        assert [f.result() for f in futures] == ["done"] * 4
+    assert len(log_path.read_text().split()) == 1
+    assert not (tmp_path / "store" / "key.lock").exists()
+
+
+def test_stale_lock(tmp_path):
+    store = SharedStore(tmp_path, timeout=0.5, poll_interval=0.01)
+    # a lock held by a process that no longer exists is removed
+    (tmp_path / "key.lock").write_text("999999999")
+    target = store.materialize("key", lambda dest: dest.mkdir())
+    assert target.is_dir()
+    # a lock held by a live process is waited for
+    (tmp_path / "other.lock").write_text(str(os.getpid()))
+    with pytest.raises(SharedStoreTimeout):
+        store.materialize("other", lambda dest: dest.mkdir())
+
+
+def test_workflow_shared_store(tmp_path, monkeypatch):
+    rts_dir = tmp_path / "RTS-GMLC"
+    ts = rts_dir / columnar.TIMESERIES_SUBDIR / "WIND"
+    ts.mkdir(parents=True)
+    (ts / "REAL_TIME_wind.csv").write_text("Year,Period,122_WIND_1\n2020,1,5.5\n2020,2,6.5\n")
+    monkeypatch.setattr(rts_gmlc, "download", lambda mirror=None: rts_dir)
+
+    wf = ManagedWorkflow("hello", "world", shared_store=tmp_path / "shm")
+    ds = wf.get_dataset("rts-gmlc")
+    col = ds.column("WIND/REAL_TIME_wind", "122_WIND_1")
+    np.testing.assert_allclose(col, [5.5, 6.5])
+    assert not col.flags.writeable
+    # another workflow (process) attaches to the same files
+    wf2 = ManagedWorkflow("hello", "world", shared_store=tmp_path / "shm")
+    ds2 = wf2.get_dataset("rts-gmlc")
+    assert ds2.meta["columnar"].root == ds.meta["columnar"].root
+    # after a new download the store is materialized again
+    time.sleep(0.01)
+    (ts / "REAL_TIME_wind.csv").write_text("Year,Period,122_WIND_1\n2020,1,1.0\n2020,2,2.0\n")
+    wf3 = ManagedWorkflow("hello", "world", shared_store=tmp_path / "shm")
+    ds3 = wf3.get_dataset("rts-gmlc")
+    np.testing.assert_allclose(ds3.column("WIND/REAL_TIME_wind", "122_WIND_1"), [1.0, 2.0])
+    assert ds3.meta["columnar"].root != ds.meta["columnar"].root
+    assert not ds.meta["columnar"].root.exists()
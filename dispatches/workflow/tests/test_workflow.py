@@ -15,10 +15,14 @@
 """
 Tests for dispatches.workflow.workflow
 """
+import asyncio
+import threading
+import time
+
 import pytest
 
 from dispatches.workflow import ManagedWorkflow
-from dispatches.workflow.workflow import Dataset, DatasetFactory
+from dispatches.workflow.workflow import Dataset, DatasetFactory, ScenarioResult
 
 
 def test_managed_workflow():
@@ -38,3 +42,119 @@ def test_dataset_factory():
     assert df.create(hello="ignored") is None
     # with unknown type, raises KeyError
     pytest.raises(KeyError, DatasetFactory, "?")
+
+
+def test_dataset_meta_is_read_only():
+    ds = Dataset("hello")
+    ds.add_meta("big", list(range(10)))
+    assert ds.meta["big"] is ds.meta["big"]
+    with pytest.raises(TypeError):
+        ds.meta["other"] = 1
+
+
+def test_dataset_files(tmp_path):
+    (tmp_path / "timeseries").mkdir()
+    (tmp_path / "readme.txt").write_text("hello")
+    (tmp_path / "timeseries" / "load.csv").write_text("Year,Load\n2020,1.5\n2020,2.5\n")
+    ds = Dataset("hello")
+    assert ds.files is None
+    ds.add_meta("directory", tmp_path)
+    index = ds.files
+    assert index is ds.meta["files"]
+    assert list(index) == ["readme.txt", "timeseries/load.csv"]
+    assert list(index.glob("*.csv")) == ["timeseries/load.csv"]
+    assert "timeseries/load.csv" in index
+    rows = ds.iter_rows("timeseries/load.csv")
+    assert next(rows) == ["Year", "Load"]
+    assert [r[1] for r in rows] == ["1.5", "2.5"]
+    with ds.open("readme.txt") as f:
+        assert f.read() == "hello"
+
+
+def scale_load(dataset, load=0.0, factor=1.0):
+    if load < 0:
+        raise ValueError("negative load")
+    return dataset, load * factor
+
+
+def test_run_scenarios():
+    wf = ManagedWorkflow("hello", "world")
+    scenarios = [{"load": 1.0, "factor": 2.0}, {"load": -1.0}, {"load": 3.0}]
+    results = wf.run_scenarios(scale_load, scenarios, dataset_type="null", max_workers=2)
+    assert [r.index for r in results] == [0, 1, 2]
+    assert all(isinstance(r, ScenarioResult) for r in results)
+    assert results[0].ok and results[0].result == (None, 2.0)
+    assert not results[1].ok and "negative load" in results[1].error
+    assert results[2].params == {"load": 3.0}
+    assert results[2].elapsed >= 0
+
+
+def test_get_dataset_async(tmp_path, monkeypatch):
+    from dispatches.workflow import rts_gmlc
+
+    calls = []
+    lock = threading.Lock()
+
+    def slow_download(mirror=None):
+        with lock:
+            calls.append(mirror)
+        time.sleep(0.1)
+        return tmp_path
+
+    monkeypatch.setattr(rts_gmlc, "download", slow_download)
+    wf = ManagedWorkflow("hello", "world")
+
+    async def main():
+        # concurrent callers share one fetch
+        results = await asyncio.gather(
+            *(wf.get_dataset_async("rts-gmlc") for _ in range(5)))
+        assert all(ds is results[0] for ds in results)
+        # memoized, as with get_dataset
+        assert await wf.get_dataset_async("rts-gmlc") is results[0]
+        both = await wf.prefetch("rts-gmlc", "null")
+        assert both == {"rts-gmlc": results[0], "null": None}
+        return results[0]
+
+    ds = asyncio.run(main())
+    assert len(calls) == 1
+    assert wf.get_dataset("rts-gmlc") is ds
+    assert ds.meta["directory"] == tmp_path
+
+
+def test_register_dataset_type(monkeypatch):
+    from dispatches.workflow import workflow, register_dataset_type, dataset_types
+
+    monkeypatch.setattr(workflow, "_registry", dict(workflow._registry))
+
+    @register_dataset_type("hello")
+    def hello(greeting="hi", **kwargs):
+        ds = Dataset("hello")
+        ds.add_meta("greeting", greeting)
+        return ds
+
+    assert "hello" in dataset_types()
+    assert {"rts-gmlc", "rts-gmlc-columnar", "null"} <= set(dataset_types())
+    wf = ManagedWorkflow("hello", "world")
+    assert wf.get_dataset("hello", greeting="hey").meta["greeting"] == "hey"
+
+
+def test_register_lazy_dataset_type(monkeypatch):
+    from dispatches.workflow import workflow, register_dataset_type
+
+    monkeypatch.setattr(workflow, "_registry", dict(workflow._registry))
+    register_dataset_type("lazy", "dispatches.workflow.datasets:null_dataset")
+    assert isinstance(workflow._registry["lazy"], str)
+    assert DatasetFactory("lazy").create() is None
+    # resolved once, then cached
+    assert callable(workflow._registry["lazy"])
+
+
+def test_import_does_not_load_backends():
+    import subprocess
+    import sys
+
+    code = ("import sys, dispatches.workflow; "
+            "print(sorted(m for m in ('prescient', 'numpy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], check=True,
+                         capture_output=True, text=True).stdout
+    assert "prescient" not in out
@@ -16,16 +16,62 @@
 Managed data workflows for Prescient
 """
 # stdlib
-import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import importlib
+import logging
+import time
+import traceback
+from types import MappingProxyType
 # package
-from . import rts_gmlc
+from .cache import DatasetCache
+from .files import FileIndex
+
+try:
+    from importlib.metadata import entry_points
+except ImportError:  # Python < 3.8
+    entry_points = None
+
+_log = logging.getLogger(__name__)
+
+#: Entry point group for dataset types provided by other packages
+ENTRY_POINT_GROUP = "dispatches.datasets"
 
 
 class ManagedWorkflow:
-    def __init__(self, name, workspace_name):
+    def __init__(self, name, workspace_name, cache_dir=None, cache_max_bytes=None,
+                 cache_max_age=None, cache_verify=False, shared_store=None):
+        """Constructor.
+
+        Args:
+            name: Name of the workflow
+            workspace_name: Name of the workspace
+            cache_dir: If given, directory for a persistent dataset cache that is
+                       shared between processes (see :class:`DatasetCache`)
+            cache_max_bytes: Evict oldest cache entries beyond this total size
+            cache_max_age: Evict cache entries older than this, in seconds
+            cache_verify: If True, only use a cache entry if the files of its
+                          dataset are unchanged since it was cached
+            shared_store: If given, node-local directory where the timeseries of
+                          each dataset are materialized once and then memory-mapped
+                          read-only by every process (see :class:`SharedStore`)
+        """
         self._name = name
         self._workspace_name = workspace_name
         self._datasets = {}
+        self._inflight = {}
+        if cache_dir is None:
+            self._cache = None
+        else:
+            self._cache = DatasetCache(cache_dir, max_bytes=cache_max_bytes,
+                                       max_age=cache_max_age)
+        self._cache_verify = cache_verify
+        if shared_store is None:
+            self._shared = None
+        else:
+            from .shared import SharedStore  # imports numpy
+            self._shared = SharedStore(shared_store)
         # TODO: create instance of DMF
 
     @property
@@ -36,19 +82,151 @@ class ManagedWorkflow:
     def workspace_name(self):
         return self._workspace_name
 
+    @property
+    def cache(self):
+        return self._cache
+
     def get_dataset(self, type_, **kwargs):
         """Creates and returns a dataset of the specified type. If called more than once with the
         same type of dataset, then returns the previous value.
+
+        If the workflow has a persistent cache, a dataset of the same type created
+        with the same keyword arguments is loaded from there instead of being created.
+
+        If the workflow has a shared store, the dataset timeseries are attached from
+        it, read-only, under the "columnar" metadata key (see :meth:`Dataset.column`).
         """
         ds = self._datasets.get(type_, None)
         if ds is not None:
             return ds
-        dsf = DatasetFactory(type_, workflow=self)
-        ds = dsf.create(**kwargs)
+        if self._cache is not None:
+            ds = self._cache.get(type_, kwargs, verify=self._cache_verify)
+        if ds is None:
+            dsf = DatasetFactory(type_, workflow=self)
+            ds = dsf.create(**kwargs)
+            if self._cache is not None and ds is not None:
+                self._cache.put(type_, kwargs, ds)
+        if self._shared is not None and ds is not None:
+            directory = ds.meta.get("directory", None)
+            if directory is not None and "columnar" not in ds.meta:
+                ds.add_meta("columnar", self._shared.columnar(directory))
         self._datasets[type_] = ds
         # TODO: register new dataset with DMF
         return ds
 
+    async def get_dataset_async(self, type_, **kwargs):
+        """Asyncio-compatible version of :meth:`get_dataset`.
+
+        The dataset is created in the event loop's default executor, so the loop
+        is free to run other tasks meanwhile. Concurrent callers for the same type
+        share a single in-flight fetch, and the result is memoized exactly as
+        with :meth:`get_dataset`.
+        """
+        ds = self._datasets.get(type_, None)
+        if ds is not None:
+            return ds
+        future = self._inflight.get(type_, None)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                None, functools.partial(self.get_dataset, type_, **kwargs))
+            self._inflight[type_] = future
+
+            def done(f, type_=type_):
+                if self._inflight.get(type_, None) is f:
+                    del self._inflight[type_]
+
+            future.add_done_callback(done)
+        # shield, so a cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    async def prefetch(self, *types, **kwargs):
+        """Fetch several types of dataset concurrently.
+
+        Args:
+            types: Dataset types
+            kwargs: Passed to :meth:`get_dataset_async` for each type
+        Returns:
+            Dict of datasets, keyed by type
+        """
+        datasets = await asyncio.gather(
+            *(self.get_dataset_async(t, **kwargs) for t in types))
+        return dict(zip(types, datasets))
+
+    def run_scenarios(self, func, scenarios, dataset_type=None, max_workers=None,
+                      **kwargs):
+        """Run the same function over many scenarios in a pool of processes.
+
+        The dataset is fetched once, in this process, through :meth:`get_dataset`
+        and sent once to each worker process, where it is reused for every
+        scenario that worker runs.
+
+        Args:
+            func: Module-level (picklable) function called as ``func(dataset, **params)``
+            scenarios: Iterable of dicts of scenario parameters
+            dataset_type: Type of dataset to pass to `func`; if None, `func` gets None
+            max_workers: Number of worker processes (default: number of CPUs)
+            kwargs: Passed to :meth:`get_dataset`
+        Returns:
+            List of :class:`ScenarioResult`, in the same order as `scenarios`
+        """
+        dataset = None if dataset_type is None else self.get_dataset(dataset_type, **kwargs)
+        scenarios = list(scenarios)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_scenario_worker,
+                                 initargs=(dataset,)) as pool:
+            futures = [pool.submit(_run_scenario, func, i, params)
+                       for i, params in enumerate(scenarios)]
+            return [f.result() for f in futures]
+
+
+class ScenarioResult:
+    """Result and timing of one scenario run by :meth:`ManagedWorkflow.run_scenarios`.
+
+    Attributes:
+        index: Position of the scenario in the input list
+        params: Scenario parameters
+        result: Return value of the scenario function, or None if it raised
+        error: Formatted traceback if the scenario function raised, otherwise None
+        elapsed: Wall-clock time of the scenario function, in seconds
+    """
+
+    __slots__ = ("index", "params", "result", "error", "elapsed")
+
+    def __init__(self, index, params, result=None, error=None, elapsed=0.0):
+        self.index = index
+        self.params = params
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else "error"
+        return "ScenarioResult(index=%d, %s, elapsed=%.3fs)" % (self.index, status, self.elapsed)
+
+
+# Dataset shared by all scenarios run in a worker process
+_scenario_dataset = None
+
+
+def _init_scenario_worker(dataset):
+    global _scenario_dataset
+    _scenario_dataset = dataset
+
+
+def _run_scenario(func, index, params):
+    t0 = time.perf_counter()
+    try:
+        result = func(_scenario_dataset, **params)
+        error = None
+    except Exception:
+        result, error = None, traceback.format_exc()
+    return ScenarioResult(index, params, result=result, error=error,
+                          elapsed=time.perf_counter() - t0)
+
 
 class Dataset:
     def __init__(self, name):
@@ -57,11 +235,50 @@ class Dataset:
 
     @property
     def meta(self):
-        return self._meta.copy()
+        """Read-only view of the metadata (not a copy).
+        """
+        return MappingProxyType(self._meta)
 
     def add_meta(self, key, value):
         self._meta[key] = value
 
+    @property
+    def files(self):
+        """Lazy :class:`FileIndex` of the files in the dataset directory, or None
+        if the dataset has no directory.
+        """
+        files = self._meta.get("files", None)
+        if isinstance(files, FileIndex):
+            return files
+        directory = self._meta.get("directory", None)
+        if directory is None:
+            return None
+        index = FileIndex(directory)
+        if files is None:
+            self._meta["files"] = index
+        return index
+
+    def open(self, rel, mode="r", **kwargs):
+        """Open a file in the dataset directory, given its relative path.
+        """
+        return self.files.open(rel, mode=mode, **kwargs)
+
+    def iter_rows(self, rel, **kwargs):
+        """Iterate over the rows of a CSV file in the dataset directory.
+        """
+        return self.files.iter_rows(rel, **kwargs)
+
+    def column(self, table, name, start=None, stop=None):
+        """Read-only, memory-mapped view of rows ``start:stop`` of a timeseries column.
+
+        Requires a columnar store in the metadata, as provided by the
+        "rts-gmlc-columnar" dataset type or by a workflow with a shared store.
+        """
+        store = self._meta.get("columnar", None)
+        if store is None:
+            raise KeyError("Dataset '%s' has no columnar timeseries" % self.name)
+        return store.column(table, name, start=start, stop=stop)
+
     def __str__(self):
         lines = [
             "Metadata",
@@ -83,20 +300,73 @@ class DatasetFactory:
 
     @classmethod
     def _get_factory_function(cls, name):
-        # This could be more dynamic..
-        if name == "rts-gmlc":
-
-            def download_fn(**kwargs):
-                rts_gmlc_dir = rts_gmlc.download()
-                dataset = Dataset(name)
-                dataset.add_meta("directory", rts_gmlc_dir)
-                dataset.add_meta("files", os.listdir(rts_gmlc_dir))
-                return dataset
-
-            return download_fn
-        elif name == "null":
-            def fn(**kwargs):
-                return None  # XXX: or do we need a NullDataset subclass?
+        factory = _registry.get(name, None)
+        if factory is None:
+            factory = _load_entry_points().get(name, None)
+            if factory is None:
+                raise KeyError(name)
+            _registry[name] = factory
+        if isinstance(factory, str):
+            # first use of a lazily registered type: import its module now
+            module_name, _, attr = factory.partition(":")
+            factory = getattr(importlib.import_module(module_name), attr)
+            _registry[name] = factory
+        return factory
+
+
+# Dataset type name -> factory function, or "module:function" to import on first use
+_registry = {}
+
+
+def register_dataset_type(name, factory=None):
+    """Register a function that creates datasets of a given type.
+
+    The factory is called with the keyword arguments of :meth:`ManagedWorkflow.get_dataset`
+    and returns a :class:`Dataset`. It may be given as a ``"module:function"`` string,
+    in which case the module is only imported when a dataset of this type is first
+    created. Without `factory`, returns a decorator::
+
+        @register_dataset_type("my-data")
+        def my_data(**kwargs):
+            ...
+
+    Other packages can also provide dataset types through the ``dispatches.datasets``
+    entry point group, with the type name as the entry point name.
+    """
+    if factory is None:
+        def decorator(fn):
+            _registry[name] = fn
             return fn
+        return decorator
+    _registry[name] = factory
+    return factory
+
+
+def dataset_types():
+    """Names of all registered dataset types, including those from entry points.
+    """
+    return sorted(set(_registry) | set(_load_entry_points()))
+
+
+def _load_entry_points():
+    """Dataset type factories advertised by installed packages, as lazy "module:function"
+    strings.
+    """
+    if entry_points is None:
+        return {}
+    try:
+        eps = entry_points()
+        if hasattr(eps, "select"):
+            group = eps.select(group=ENTRY_POINT_GROUP)
         else:
-            raise KeyError(name)
+            group = eps.get(ENTRY_POINT_GROUP, [])
+    except Exception as err:  # broken package metadata must not break workflows
+        _log.warning(f"Cannot read '{ENTRY_POINT_GROUP}' entry points: {err}")
+        return {}
+    return {ep.name: ep.value for ep in group}
+
+
+register_dataset_type("rts-gmlc", "dispatches.workflow.datasets:rts_gmlc_dataset")
+register_dataset_type("rts-gmlc-columnar",
+                      "dispatches.workflow.datasets:rts_gmlc_columnar_dataset")
+register_dataset_type("null", "dispatches.workflow.datasets:null_dataset")